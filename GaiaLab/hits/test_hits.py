@@ -236,8 +236,9 @@ class TestHitDetectorDensityFuncs(unittest.TestCase):
 # -----------hitsimulator.py tests---------------------------------------------
 class TestHitSimulatorNumericalFuncs(unittest.TestCase):
     def test_hit_distribution_returns_correct_values(self):
-        self.assertTrue(hit_distribution(1)[0][0] <= 2*np.pi)
-        self.assertTrue(hit_distribution(1)[0][1] <= 4.5)
+        theta, radius = hit_distribution(1)
+        self.assertTrue(theta[0] <= 2*np.pi)
+        self.assertTrue(radius[0] <= 4.5)
 
     def test_flux_expected_values_mass(self):
         # Test the flux function returns expected values.
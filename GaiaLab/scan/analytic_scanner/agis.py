@@ -27,10 +27,16 @@ from source import Source
 from agis_functions import *
 
 # global modules
+import functools
 import numpy as np
-from scipy.interpolate import BSpline
+from scipy.interpolate import BSpline, PPoly
+from scipy import linalg
 from scipy import sparse as sps
 import quaternion  # moble's quaternion (numpy compatible quaternions)
+try:  # scikit-sparse is optional, spsolve is the fallback
+    from sksparse.cholmod import cholesky as sparse_cholesky
+except ImportError:
+    sparse_cholesky = None
 
 
 class Calc_source:
@@ -67,7 +73,7 @@ class Agis:
     def __init__(self, sat, calc_sources=[], real_sources=[], attitude_splines=None,
                  verbose=False, spline_degree=3, attitude_regularisation_factor=0,
                  updating='attitude', degree_error=0, double_telescope=False,
-                 use_only_AL=False):
+                 use_only_AL=False, basis_dtype=np.float64):
         """
         Also contains:
         **Temporary variables**
@@ -79,6 +85,11 @@ class Agis:
         # self.att_coeffs  # attitude parameters
         Attributes:
             :calc_sources: list of estimated sources
+        :param basis_dtype: dtype of the stored B-spline basis table. The
+            dense (N_coeff, N_obs) table dominates the memory footprint, and
+            np.float32 halves it (the basis values only need ~7 digits); keep
+            the float64 default when bitwise agreement with the spline
+            evaluation matters.
         """
         # Objects
 
@@ -86,6 +97,17 @@ class Agis:
         self.real_sources = real_sources
         #: List of calculated sources with 1-1 correspondance to the real sources
         self.calc_sources = calc_sources
+        #: All the source parameters aggregated in one (n_sources, 5) array.
+        #: Each calc_source.s_params is rebound to a view of its row, so that
+        #: per-source writes propagate and batched operations can use one
+        #: contiguous array
+        if len(self.calc_sources) > 0:
+            self.all_s_params = np.stack([np.asarray(cs.s_params, dtype='float64')
+                                          for cs in self.calc_sources])
+            for i, calc_source in enumerate(self.calc_sources):
+                calc_source.s_params = self.all_s_params[i]
+        else:
+            self.all_s_params = np.zeros((0, 5))
         #: Satellite object that we are using to solve the problem
         self.sat = sat
 
@@ -101,12 +123,17 @@ class Agis:
         self.consider_stellar_aberation = False  # TODO: remove because obsolete?
         self.degree_error = degree_error  # [only for source] deviation in vertical direction of the attitude
         self.double_telescope = double_telescope  # bool indicating if we use the double_telescope config
+        #: Half-angle of the cheap out-of-field pre-test in compute_R_L.
+        #: The default pi/2 rejects nothing; tighten it to prune pairs that
+        #: are far from the scanning plane
+        self.fov_limit_angle = np.pi / 2
 
         # Mutable:
         self.iter_counter = 0
         self.N = 0  # not necessary
         self.attitude_der_matrix = None  # sparse attitude derivative matrix
         self.attitude_reg_matrix = None  # sparse attitude derivative matrix
+        self._bG_table = None  # ephemeris evaluated at all the observed times, (3, N_obs)
         self.discretized_attitude = None  # attitude evaluated at all the observed times
 
         # Setting observation times
@@ -117,14 +144,30 @@ class Agis:
             for t in calc_source.obs_times:
                 self.time_dict[t] = source_index
         self.all_obs_times = np.sort(all_obs_times)
+        #: Flattened (time, source_index) pairs for the batched evaluations
+        self._obs_times_arr = self.all_obs_times
+        self._source_index_arr = np.array([self.time_dict[t] for t in self.all_obs_times], dtype=int)
+        #: Observed time -> index in all_obs_times, for O(1) lookups in the inner loops
+        self._obs_index = {float(t): i for i, t in enumerate(self.all_obs_times)}
 
         # Set attitude
         if attitude_splines is not None:  # Set everything for the attitude
             c, t, s = extract_coeffs_knots_from_splines(attitude_splines, self.k)
             self.c = c.copy()
             self.att_coeffs, self.att_knots, self.attitude_splines = (c, t, s)
-            self.att_bases = get_basis_Bsplines(self.att_knots, self.att_coeffs[0], self.k, self.all_obs_times)
+            self.att_bases = get_basis_Bsplines(self.att_knots, self.att_coeffs[0], self.k,
+                                                self.all_obs_times).astype(basis_dtype, copy=False)
+            #: Sparse view of the bases: at most k+1 of them are non-zero at
+            #: any observed time, so the dense (N_coeff, N_obs) array is mostly zeros
+            self.att_bases_csr = sps.csr_matrix(self.att_bases)
             self.N = self.att_coeffs.shape[1]  # number of coeffs per parameter
+            #: Bases restricted to the strict support ]knots[n], knots[n+M][ of
+            #: each spline, the set of times the attitude update iterates on
+            indices = np.arange(self.N)
+            support_mask = ((self.att_knots[indices][:, np.newaxis] < self.all_obs_times[np.newaxis, :])
+                            & (self.all_obs_times[np.newaxis, :] < self.att_knots[indices + self.M][:, np.newaxis]))
+            self.att_bases_support_csr = sps.csr_matrix(np.where(support_mask, self.att_bases, 0))
+            self._update_attitude_ppolys()
 
     # ### Generic functions for all kind of updating -----------------------------------
     def reset_iterations(self):
@@ -143,9 +186,8 @@ class Agis:
         for source_index, s in enumerate(self.calc_sources):
             if self.verbose:
                 print('source: {}'.format(s.s_params))
-            for j, t_L in enumerate(s.obs_times):
-                R_L_AL, R_L_AC = self.compute_R_L(source_index, t_L)
-                error += (R_L_AL ** 2 + R_L_AC ** 2)
+            R_L_AL, R_L_AC = self.compute_R_L_batch(source_index, np.asarray(s.obs_times))
+            error += np.sum(R_L_AL ** 2) + np.sum(R_L_AC ** 2)
         return error / self.all_obs_times.shape[0]  # /const.rad_per_mas
 
     def get_field_angles(self, source_index, t):
@@ -171,6 +213,89 @@ class Agis:
                                                       self.sat, t, self.double_telescope)
         return eta_obs, zeta_obs, eta_calc, zeta_calc
 
+    def get_attitude_array(self, t_array, unit=True):
+        """
+        Batched version of :func:`get_attitude`: evaluate the attitude splines
+        on a whole array of times at once.
+
+        :param t_array: [1D array] times at which we desire the attitude
+        :param unit: [bool] if true normalize the quaternions
+        :returns: (N, 4) array with one (w, x, y, z) quaternion per row
+        """
+        attitude_array = np.column_stack([p(t_array) for p in self.att_ppolys])
+        if unit:
+            attitude_array = ft.unit_quaternion_array(attitude_array)
+        return attitude_array
+
+    def get_gaia_attitude_array(self, t_array):
+        """
+        Evaluate the (normalized) attitude of the satellite on an array of
+        times, see :func:`Satellite.func_attitude`.
+
+        :param t_array: [1D array] times at which we desire the attitude
+        :returns: (N, 4) array with one (w, x, y, z) unit quaternion per row
+        """
+        attitude_array = np.column_stack([self.sat.s_w(t_array), self.sat.s_x(t_array),
+                                          self.sat.s_y(t_array), self.sat.s_z(t_array)])
+        return ft.unit_quaternion_array(attitude_array)
+
+    def get_source_update_attitude_array(self, source_index, t_array):
+        """
+        Attitude array used when updating the sources (one quaternion per
+        observation time), depending on the updating mode.
+        :returns: (N, 4) array with one (w, x, y, z) quaternion per row
+        """
+        if self.updating == 'source':
+            # This loop stays scalar because of the per-time attitude cache;
+            # fromiter with a known count writes straight into the output
+            return np.fromiter((quaternion.as_float_array(self.get_attitude_for_source(source_index, t))
+                                for t in t_array),
+                               dtype=np.dtype((np.float64, 4)), count=len(t_array))
+        elif self.updating == 'scanned source':
+            return self.get_gaia_attitude_array(t_array)
+        else:
+            raise ValueError('not yet implemented for this kind of updating')
+
+    def get_field_angles_batch(self, source_index, t_array):
+        """
+        Batched version of :func:`get_field_angles` for all the given times at once.
+        :returns: [eta_obs, zeta_obs, eta_calc, zeta_calc] as (N,) arrays
+        """
+        t_array = np.asarray(t_array)
+        # Set attitude, it depends if we wanna update only sources or also attitude params
+        if self.updating == 'source' or self.updating == 'scanned source':
+            attitude_array = self.get_source_update_attitude_array(source_index, t_array)
+            attitude_gaia = attitude_array
+        elif self.updating == 'attitude':
+            attitude_array = self.get_attitude_array(t_array)
+            attitude_gaia = self.get_gaia_attitude_array(t_array)
+        else:
+            raise ValueError('incorrect value for self.updating')
+
+        eta_obs, zeta_obs = observed_field_angles_array(self.real_sources[source_index],
+                                                        attitude_gaia,
+                                                        self.sat, t_array, self.double_telescope)
+        eta_calc, zeta_calc = calculated_field_angles_array(self.calc_sources[source_index],
+                                                            attitude_array,
+                                                            self.sat, t_array, self.double_telescope)
+        return eta_obs, zeta_obs, eta_calc, zeta_calc
+
+    def compute_R_L_batch(self, source_index, t_array):
+        """
+        Batched version of :func:`compute_R_L` for all the given times at once.
+        :returns: (R_L_eta, R_L_zeta) as (N,) arrays
+        """
+        angles = self.get_field_angles_batch(source_index, t_array)
+        f_color = self.real_sources[source_index].func_color(t_array)
+        m_color = self.real_sources[source_index].mean_color
+        eta_obs, zeta_obs = compute_deviated_angles_color_aberration(angles[0], angles[1],
+                                                                     f_color, self.degree_error)
+        eta_calc, zeta_calc = compute_deviated_angles_color_aberration(angles[2], angles[3],
+                                                                       m_color, self.degree_error)
+        R_L_eta = eta_obs - eta_calc  # AL
+        R_L_zeta = zeta_obs - zeta_calc  # AC
+        return (R_L_eta, R_L_zeta)
+
     def deviate_field_angles_color_aberration(self, source_index, t, angles):
         """ apply color aberration deviation to field angles (eta, zeta)"""
         # # WARNING: check also deviation in the source update
@@ -188,8 +313,12 @@ class Agis:
         R_AL = R_eta
         R_AC = R_zeta
         """
-        # WARNING: maybe source is not in the field of vision of sat at time t!
-        R_L_eta, R_L_zeta = (0, 0)
+        # Cheap geometric pre-test for a source out of the field of vision:
+        # across-scan distance of the source from the scanning plane
+        if self.fov_limit_angle < np.pi / 2:
+            Cu = self.real_sources[source_index].unit_topocentric_function(self.sat, t)
+            if np.abs(np.dot(Cu, self.sat.func_z_axis_lmn(t))) > np.sin(self.fov_limit_angle):
+                return (0, 0)
 
         angles = self.get_field_angles(source_index, t)
 
@@ -207,6 +336,10 @@ class Agis:
         if self.verbose is True:
             verbosity += 1
 
+        # The ephemeris does not depend on the unknowns: evaluate it once for
+        # all the observed times instead of once per (source, observation)
+        self._bG_table = self.sat.ephemeris_bcrs(self.all_obs_times)
+
         for i in range(num):
             self.iter_counter += 1
             if verbosity > 0:
@@ -231,10 +364,14 @@ class Agis:
     # ### Functions only for sources updating (source and scanned source)
     def update_S_block(self):
         """ Performs the update of the source parameters """
+        # One evaluation for the whole block: the error is a global scalar,
+        # recomputing it per source made the block quadratic in the sources
+        error_before = self.error_function()
         for i, calc_source in enumerate(self.calc_sources):
             calc_source.s_old.append(calc_source.s_params.copy())
-            calc_source.errors.append(self.error_function())
+            calc_source.errors.append(error_before)
             self.update_block_S_i(i)
+        self.get_attitude_for_source.cache_clear()
 
     def update_block_S_i(self, source_index):
         """
@@ -242,18 +379,25 @@ class Agis:
         :param source_index: [int] Index of the source that will be updated
         :action: update source number *source_index*
         """
-        calc_source = self.calc_sources[source_index]
         A = self.block_S_error_rate_matrix(source_index)
-        W = np.eye(len(calc_source.obs_times))
         h = self.compute_h(source_index)
-        LHS = A.transpose() @ W @ A
-        RHS = A.transpose() @ W @ h
-        d = np.linalg.solve(LHS, RHS)
+        LHS = A.transpose() @ A
+        RHS = A.transpose() @ h
+        try:
+            # The normal matrix A'A is symmetric positive-definite for a
+            # well-conditioned source, hence solve by Cholesky instead of a
+            # general LU factorization
+            cho = linalg.cho_factor(LHS, lower=True)
+            d = linalg.cho_solve(cho, RHS)
+        except linalg.LinAlgError:
+            # Degenerate observation geometry only makes A'A semi-definite,
+            # which Cholesky rejects; fall back to the general solver
+            d = np.linalg.solve(LHS, RHS)
         d = d.flatten()
         self.calc_sources[source_index].s_params[:] += d
         if self.verbose:
-            print('dim A:{}\ndim W:{}\ndim h:{}\ndim d:{}'
-                  .format(A.shape, W.shape, h.shape, d.shape))
+            print('dim A:{}\ndim h:{}\ndim d:{}'
+                  .format(A.shape, h.shape, d.shape))
 
     def compute_h(self, source_index):
         """
@@ -262,10 +406,8 @@ class Agis:
         :param source_index: [int] Index of the source that will be updated
         """
         calc_source = self.calc_sources[source_index]
-        h = np.zeros((len(calc_source.obs_times), 1))
-        for i, t_L in enumerate(calc_source.obs_times):
-            R_L_AL, R_L_AC = self.compute_R_L(source_index, t_L)
-            h[i, 0] = (R_L_AL + R_L_AC)
+        R_L_AL, R_L_AC = self.compute_R_L_batch(source_index, np.asarray(calc_source.obs_times))
+        h = (R_L_AL + R_L_AC).reshape(-1, 1)
         if self.verbose:
             print('h: {}'.format(h))
         return h
@@ -294,24 +436,15 @@ class Agis:
         """
 
         calc_source = self.calc_sources[source_index]
-        dR_ds_AL = np.zeros((len(calc_source.obs_times), 5))
-        dR_ds_AC = np.zeros(dR_ds_AL.shape)
-
-        # Iterate through the observation times of the source we are currently
-        # updating
-        for i, t_L in enumerate(calc_source.obs_times):
-            if self.updating == 'source':
-                attitude = self.get_attitude_for_source(source_index, t_L)
-            elif self.updating == 'scanned source':
-                attitude = self.sat.func_attitude(t_L)
-            else:
-                raise ValueError('not yet implemented for this kind of updating')
-            # Set double_telescope to False to get phi
-            phi, zeta = calculated_field_angles(calc_source, attitude, self.sat, i, double_telescope=False)
-            phi, zeta = compute_deviated_angles_color_aberration(phi, zeta, calc_source.mean_color, self.degree_error)
-            m, n, u = compute_mnu(phi, zeta)
-            dR_ds_AL[i, :] = -m @ du_ds[:, :, i].transpose() * helpers.sec(zeta)
-            dR_ds_AC[i, :] = -n @ du_ds[:, :, i].transpose()
+        t_array = np.asarray(calc_source.obs_times)
+        attitude_array = self.get_source_update_attitude_array(source_index, t_array)
+        # Set double_telescope to False to get phi
+        phi, zeta = calculated_field_angles_array(calc_source, attitude_array, self.sat,
+                                                  t_array, double_telescope=False)
+        phi, zeta = compute_deviated_angles_color_aberration(phi, zeta, calc_source.mean_color, self.degree_error)
+        m, n, u = compute_mnu_array(phi, zeta)
+        dR_ds_AL = -np.einsum('lj,sjl->ls', m, du_ds) * helpers.sec(zeta)[:, np.newaxis]
+        dR_ds_AC = -np.einsum('lj,sjl->ls', n, du_ds)
 
         return (dR_ds_AL, dR_ds_AC)
 
@@ -331,27 +464,31 @@ class Agis:
         # In this function consider all u as being ũ! (for notation we call them here u)
         # Values needed to compute the derivatives
         calc_source = self.calc_sources[source_index]
-        n_i = len(calc_source.obs_times)  # the number of observations
-        du_ds = np.zeros((5, 3, n_i))
+        t_array = np.asarray(calc_source.obs_times)
+        n_i = len(t_array)  # the number of observations
         alpha = calc_source.s_params[0]
         delta = calc_source.s_params[1]
         p, q, r = ft.compute_pqr(alpha, delta)
         r.shape = (3, 1)  # reshapes r
-        # For each observation compute du/ds
-        for j, t_l in enumerate(calc_source.obs_times):  # t_l being the observation time
-            b_G = self.sat.ephemeris_bcrs(t_l)
-            t_B = t_l  # + np.dot(r, b_G) / const.c
-            tau = t_B - const.t_ep
-            # Compute derivatives
-            du_dalpha = p
-            du_ddelta = q
-            du_dparallax = compute_du_dparallax(r, b_G)
-            du_dmualpha = p*tau
-            du_dmudelta = q*tau
-            CoMRS_derivatives = [du_dalpha, du_ddelta, du_dparallax, du_dmualpha, du_dmudelta]
-            SRS_derivatives = self.CoMRS_to_SRS_for_source_derivatives(CoMRS_derivatives, calc_source,
-                                                                       t_l, source_index)
-            du_ds[:, :, j] = SRS_derivatives
+        if self._bG_table is not None:
+            obs_idx = np.fromiter((self._obs_index[t] for t in t_array), dtype=int, count=n_i)
+            b_G = self._bG_table[:, obs_idx]
+        else:
+            b_G = self.sat.ephemeris_bcrs(t_array)  # (3, n_i)
+        t_B = t_array  # + r' @ b_G / const.c
+        tau = t_B - const.t_ep
+        # Compute the CoMRS derivatives, one (n_i, 3) array per parameter
+        du_dalpha = np.tile(p, (n_i, 1))
+        du_ddelta = np.tile(q, (n_i, 1))
+        du_dparallax = compute_du_dparallax_array(r, b_G)
+        du_dmualpha = p[np.newaxis, :] * tau[:, np.newaxis]
+        du_dmudelta = q[np.newaxis, :] * tau[:, np.newaxis]
+        CoMRS_derivatives = [du_dalpha, du_ddelta, du_dparallax, du_dmualpha, du_dmudelta]
+        # Rotate them to the SRS with one attitude per observation time
+        attitude_array = self.get_source_update_attitude_array(source_index, t_array)
+        du_ds = np.zeros((5, 3, n_i))
+        for s, derivative in enumerate(CoMRS_derivatives):
+            du_ds[s, :, :] = ft.lmn_to_xyz_array(attitude_array, derivative).T
         if self.verbose:
             print('du_ds.shape: {}'.format(du_ds.shape))
         return du_ds
@@ -372,8 +509,12 @@ class Agis:
             SRS_derivatives.append(ft.lmn_to_xyz(attitude, derivative))
         return SRS_derivatives
 
+    @functools.lru_cache(maxsize=1 << 20)
     def get_attitude_for_source(self, source_index, t):
         """ For only source updating with color aberration.
+        The attitude for a given (source_index, t) pair is stable within one
+        S-block iteration and requested by several routines, hence the cache
+        (cleared at the end of each update_S_block).
         Change if condition to decide which sources are affected by that aberration
         :param source_index: [int] Index of the source that will be updated
         """
@@ -391,54 +532,113 @@ class Agis:
         Get attitude from the attitude coefficients at time *t*. If *unit*
         is True, the return normalized attitude.
 
+        The attitude evaluated at the observed times is cached (and the
+        splines are evaluated through their piecewise-polynomial form), since
+        the attitude update asks for the same times over and over within one
+        iteration.
+
         :param t: [float] time at which we desire the attitude
         :param unit: [bool] if true normalize the quaternion
         :returns: [Quaternion object] attitude
         """
-        s_w = self.attitude_splines[0]
-        s_x = self.attitude_splines[1]
-        s_y = self.attitude_splines[2]
-        s_z = self.attitude_splines[3]
-        attitude = np.quaternion(s_w(t), s_x(t), s_y(t), s_z(t))
+        if self._attitude_obs_cache is None:
+            self._build_attitude_obs_cache()
+        wxyz = self._attitude_obs_cache.get(t)
+        if wxyz is None:
+            wxyz = [p(t) for p in self.att_ppolys]
+        attitude = np.quaternion(*wxyz)
         if unit:
             attitude = attitude.normalized()
         return attitude
 
+    def _update_attitude_ppolys(self):
+        """
+        :action: Re-create the piecewise-polynomial form of the attitude
+                 splines (cheaper to evaluate than the B-form, see scipy
+                 PPoly.from_spline) and drop the stale attitude cache.
+        """
+        self.att_ppolys = [PPoly.from_spline((self.att_knots, coeffs, self.k))
+                           for coeffs in self.att_coeffs]
+        self._attitude_obs_cache = None
+        self._coeff_basis_sums = None
+
+    def get_coeff_basis_sums(self):
+        """
+        coeff_basis_sum and the attitude deviation D_L for every observed
+        time. They depend only on the current attitude coefficients — not on
+        the spline indices (m, n) — hence they are computed once per attitude
+        iteration and dropped when the splines are actualised.
+
+        :returns: (cbs, D_L) arrays of shapes (N_obs, 4) and (N_obs,)
+        """
+        if self._coeff_basis_sums is None:
+            n_obs = len(self.all_obs_times)
+            cbs = np.zeros((n_obs, 4))
+            for j, t_L in enumerate(self.all_obs_times):
+                left_index = get_left_index(self.att_knots, t=t_L, M=self.M)
+                cbs[j] = compute_coeff_basis_sum(self.att_coeffs, self.att_bases, left_index, self.M, j)
+            D_L = np.array([compute_attitude_deviation(c) for c in cbs])
+            self._coeff_basis_sums = (cbs, D_L)
+        return self._coeff_basis_sums
+
+    def _build_attitude_obs_cache(self):
+        """
+        :action: Evaluate the four attitude components at all the observed
+                 times in one batched call per component and cache the result.
+        """
+        values = np.column_stack([p(self.all_obs_times) for p in self.att_ppolys])
+        self._attitude_obs_cache = {t: row for t, row in zip(self.all_obs_times, values)}
+
+    def normalize_coefficients(self):
+        """
+        :action: Normalize every attitude coefficient quadruple (one column
+                 of att_coeffs) to unit norm in a single vectorized call,
+                 then rebuild the splines so the ppolys and the attitude
+                 caches serve the normalized coefficients
+        """
+        norms = np.linalg.norm(self.att_coeffs, axis=0)
+        # Guard against a zero column silently propagating NaNs
+        self.att_coeffs /= np.maximum(norms, 1e-300)[np.newaxis, :]
+        self.actualise_splines()
+
     def actualise_splines(self):
         """
         :action: Update the splines re-creating them from the new coefficients
         """
         for i in range(self.attitude_splines.shape[0]):
             self.attitude_splines[i] = BSpline(self.att_knots, self.att_coeffs[i], k=self.k)
+        self._update_attitude_ppolys()
 
     def update_A_block(self, use_sparse=False):  # one
         """ solve for the attitude"""
         if use_sparse is True:
             der_band, reg_band = self.compute_attitude_banded_derivative_and_regularisation_matrices()
             self.compute_sparses_matrices(der_band, reg_band)
-            LHS = self.attitude_der_matrix + self.attitude_reg_matrix
+            LHS = (self.attitude_der_matrix + self.attitude_reg_matrix).tocsc()
             RHS = self.compute_attitude_RHS()
-            d = sps.linalg.spsolve(LHS, RHS)
+            if sparse_cholesky is not None:
+                # The normal matrix is symmetric positive-definite: a sparse
+                # Cholesky factorization beats the general sparse LU
+                d = sparse_cholesky(LHS)(RHS).ravel()
+            else:
+                d = sps.linalg.spsolve(LHS, RHS)
 
         else:
             LHS = self.compute_attitude_LHS()
             # LHS = self.N_aa
             RHS = self.compute_attitude_RHS()
             # RHS = self.h
-            d = np.linalg.solve(LHS, RHS)
+            d = self.solve_banded_attitude_system(LHS, RHS)
             # L = np.linalg.cholesky(LHS)
             # y = np.linalg.solve(L, RHS)
             # d = np.linalg.solve(L.T, y)
             # d = np.linalg.lstsq(LHS, RHS)  # not what it is for
-        self.d = d.reshape(self.att_coeffs.shape)
-        c_update = d.reshape(self.att_coeffs.shape)
-        for i in range(0, self.att_coeffs.shape[1]):
-            c_update[0, i] = d[i*4]
-            c_update[1, i] = d[i*4+1]
-            c_update[2, i] = d[i*4+2]
-            c_update[3, i] = d[i*4+3]
+        # d is ordered per coefficient index (w, x, y, z), i.e. the transpose
+        # of the (4, N) coefficients layout
+        c_update = d.reshape(-1, 4).transpose().copy()
+        self.d = c_update
         self.c_update = c_update.copy()
-        self.att_coeffs[:, :] += c_update[:, :].copy()
+        self.att_coeffs[:, :] += c_update[:, :]
         self.actualise_splines()  # Create the new splines
 
     def update_A_block_bis(self):  # bis
@@ -454,18 +654,57 @@ class Agis:
     def compute_attitude_LHS(self):
         N_aa_dim = self.att_coeffs.shape[1]  # *4
         N_aa = np.zeros((N_aa_dim*4, N_aa_dim*4))
-        for n in range(0, N_aa_dim):  # # TODO:  take advantage of the symmetry
-            for m in range(0, N_aa_dim):  # # TODO: avoid doing the brute force version
-                # for m in range(max((n-self.k), 0), min((n+self.k)+1, N_aa_dim+1)):
-                N_aa[n*4:n*4+4, m*4:m*4+4] = self.compute_Naa_mn(m, n)
+        # B-splines m and n have overlapping support only if |m-n| <= k, hence
+        # only the blocks inside that band can be non-zero. By symmetry
+        # N_aa[m, n] = N_aa[n, m]' so each off-diagonal block is computed once.
+        for n in range(0, N_aa_dim):
+            for m in range(n, min(n+self.k+1, N_aa_dim)):
+                block = self.compute_Naa_mn(m, n)
+                N_aa[n*4:n*4+4, m*4:m*4+4] = block
+                if m != n:
+                    N_aa[m*4:m*4+4, n*4:n*4+4] = block.T
         self.N_aa = N_aa
         return N_aa
 
+    def solve_banded_attitude_system(self, LHS, RHS):
+        """
+        Solve LHS @ d = RHS exploiting the block-banded structure of the
+        attitude normal matrix: the bandwidth is 4k+3 on each side of the
+        diagonal (see :func:`compute_attitude_LHS`).
+
+        :param LHS: [numpy array] dense (4N, 4N) block-banded matrix
+        :param RHS: [numpy array] (4N, 1) right hand side
+        :returns: [numpy array] solution of the system
+        """
+        n_band = 4*self.k + 3
+        dim = LHS.shape[0]
+        ab = np.zeros((2*n_band+1, dim))
+        for offset in range(-n_band, n_band+1):
+            diag = np.diagonal(LHS, offset)
+            ab[n_band-offset, max(offset, 0):max(offset, 0)+len(diag)] = diag
+        return linalg.solve_banded((n_band, n_band), ab, RHS)
+
     def compute_attitude_RHS(self):
-        N_aa_dim = self.att_coeffs.shape[1]
-        RHS = np.zeros((N_aa_dim*4, 1))
-        for n in range(0, N_aa_dim):
-            RHS[n*4:n*4+4] = self.compute_attitude_RHS_n(n)
+        """
+        Assemble the whole right-hand side at once. Since
+        rhs_n = -sum_i b_n(i) * (reg^2 * (-2*cbs_i) * D_L_i
+                                 + dR_dq_AL_i * R_AL_i + dR_dq_AC_i * R_AC_i),
+        the per-observation vector can be computed once and the sum over each
+        spline support becomes a single sparse matrix-vector product with the
+        support-restricted basis matrix.
+        """
+        cbs_all, D_L_all = self.get_coeff_basis_sums()
+        n_obs = len(self.all_obs_times)
+        V = np.zeros((n_obs, 4))
+        for j, t_L in enumerate(self.all_obs_times):
+            source_index = self.get_source_index(t_L)
+            calc_source = self.calc_sources[source_index]
+            attitude = self.get_attitude(t_L, unit=False)
+            dR_dq_AL, dR_dq_AC = compute_dR_dq(calc_source, self.sat, attitude, t_L)
+            R_L_AL, R_L_AC = self.compute_R_L(source_index, t_L)
+            V[j] = dR_dq_AL * R_L_AL + dR_dq_AC * R_L_AC
+        V += self.attitude_regularisation_factor**2 * (-2.0) * cbs_all * D_L_all[:, np.newaxis]
+        RHS = -(self.att_bases_support_csr @ V).reshape(-1, 1)
         self.h = RHS.copy()
         return RHS
 
@@ -477,82 +716,81 @@ class Agis:
             raise ValueError('time not in time_dict')
 
     def compute_attitude_RHS_n(self, n_index):
-        rhs = np.zeros((4, 1))
         time_support_spline_n = get_times_in_knot_interval(self.all_obs_times, self.att_knots, n_index, self.M)
 
-        # Iterate through the support of spline_n
+        # Gather the per-observation quantities into plain arrays so that the
+        # accumulation itself can run in the jitted kernel
+        n_times = len(time_support_spline_n)
+        dDL_n = np.zeros((n_times, 4))
+        D_L_arr = np.zeros(n_times)
+        dR_dq_AL_arr = np.zeros((n_times, 4))
+        dR_dq_AC_arr = np.zeros((n_times, 4))
+        R_AL_arr = np.zeros(n_times)
+        R_AC_arr = np.zeros(n_times)
+        cbs_all, D_L_all = self.get_coeff_basis_sums()
+        # The support times are a contiguous slice of all_obs_times, so the
+        # basis values can be gathered as one contiguous slice
+        if n_times > 0:
+            first_index = self._obs_index[time_support_spline_n[0]]
+            bases_n = self.att_bases[n_index, first_index:first_index + n_times]
+        else:
+            bases_n = np.zeros(0)
         for i, t_L in enumerate(time_support_spline_n):
             source_index = self.get_source_index(t_L)
             calc_source = self.calc_sources[source_index]
 
             attitude = self.get_attitude(t_L, unit=False)
-            left_index = get_left_index(self.att_knots, t_L, M=self.M)
-            obs_time_index = list(self.all_obs_times).index(t_L)
+            obs_time_index = self._obs_index[t_L]
 
             # Get the regulation part:
-            coeff_basis_sum = compute_coeff_basis_sum(self.att_coeffs, self.att_bases,
-                                                      left_index, self.M, obs_time_index)
-            D_L = compute_attitude_deviation(coeff_basis_sum)
-            dDL_da_n = compute_DL_da_i(coeff_basis_sum, self.att_bases, obs_time_index, n_index)
-            # dDL_da_n = compute_DL_da_i_from_attitude(attitude, self.att_bases, obs_time_index, n_index)
-            regularisation_part = self.attitude_regularisation_factor**2 * dDL_da_n * D_L
+            D_L_arr[i] = D_L_all[obs_time_index]
+            dDL_n[i] = compute_DL_da_i(cbs_all[obs_time_index], self.att_bases, obs_time_index, n_index).ravel()
 
             # Get derivatives:
-            dR_dq_AL, dR_dq_AC = compute_dR_dq(calc_source, self.sat, attitude, t_L)
-            dR_da_n_AL = dR_da_i(dR_dq_AL, self.att_bases[n_index, obs_time_index])
-            dR_da_n_AC = dR_da_i(dR_dq_AC, self.att_bases[n_index, obs_time_index])
+            dR_dq_AL_arr[i], dR_dq_AC_arr[i] = compute_dR_dq(calc_source, self.sat, attitude, t_L)
 
-            R_L_AL, R_L_AC = self.compute_R_L(source_index, t_L)
+            R_AL_arr[i], R_AC_arr[i] = self.compute_R_L(source_index, t_L)
 
-            rhs += regularisation_part + dR_da_n_AL * R_L_AL + dR_da_n_AC * R_L_AC
-        return -rhs
+        return accumulate_attitude_rhs_n(bases_n, dDL_n, D_L_arr, dR_dq_AL_arr, dR_dq_AC_arr,
+                                         R_AL_arr, R_AC_arr, self.attitude_regularisation_factor)
 
     def compute_Naa_mn(self, m_index, n_index):
         """compute dR/da (i.e. wrt coeffs)"""
-        Naa_mn = np.zeros((4, 4))
-
         # Get times in the support of both spline_m and spline_n
-        time_support_spline_m = get_times_in_knot_interval(self.all_obs_times, self.att_knots, m_index, self.M)
-        time_support_spline_n = get_times_in_knot_interval(self.all_obs_times, self.att_knots, n_index, self.M)
-        time_support_spline_mn = np.sort(helpers.get_lists_intersection(time_support_spline_m, time_support_spline_n))
-
-        # Iterate through all observation in the support of spline n and spline m
+        time_support_spline_mn = get_times_in_knot_intervals_intersection(self.all_obs_times, self.att_knots,
+                                                                           m_index, n_index, self.M)
+
+        # Gather the per-observation quantities into plain arrays so that the
+        # accumulation itself can run in the jitted kernel
+        n_times = len(time_support_spline_mn)
+        dDL_n = np.zeros((n_times, 4))
+        dDL_m = np.zeros((n_times, 4))
+        dR_dq_AL_arr = np.zeros((n_times, 4))
+        dR_dq_AC_arr = np.zeros((n_times, 4))
+        cbs_all, D_L_all = self.get_coeff_basis_sums()
+        # The support times are a contiguous slice of all_obs_times, so the
+        # basis values can be gathered as contiguous slices
+        if n_times > 0:
+            first_index = self._obs_index[time_support_spline_mn[0]]
+            bases_n = self.att_bases[n_index, first_index:first_index + n_times]
+            bases_m = self.att_bases[m_index, first_index:first_index + n_times]
+        else:
+            bases_n = np.zeros(0)
+            bases_m = np.zeros(0)
         for i, t_L in enumerate(time_support_spline_mn):
-            # for i, t_L in enumerate(self.all_obs_times):
             calc_source = self.calc_sources[self.get_source_index(t_L)]
             attitude = self.get_attitude(t_L, unit=False)
-            left_index = get_left_index(self.att_knots, t=t_L, M=self.M)
-            obs_time_index = list(self.all_obs_times).index(t_L)
+            obs_time_index = self._obs_index[t_L]
 
             # Compute the regulation part
-            coeff_basis_sum = compute_coeff_basis_sum(self.att_coeffs, self.att_bases,
-                                                      left_index, self.M, obs_time_index)
-            dDL_da_n = compute_DL_da_i(coeff_basis_sum, self.att_bases, obs_time_index, n_index)
-            dDL_da_m = compute_DL_da_i(coeff_basis_sum, self.att_bases, obs_time_index, m_index)
-            # dDL_da_n = compute_DL_da_i_from_attitude(attitude, self.att_bases, obs_time_index, n_index)
-            # dDL_da_m = compute_DL_da_i_from_attitude(attitude, self.att_bases, obs_time_index, m_index)
-            regularisation_part = self.attitude_regularisation_factor**2 * dDL_da_n @ dDL_da_m.T
+            dDL_n[i] = compute_DL_da_i(cbs_all[obs_time_index], self.att_bases, obs_time_index, n_index).ravel()
+            dDL_m[i] = compute_DL_da_i(cbs_all[obs_time_index], self.att_bases, obs_time_index, m_index).ravel()
 
             # Compute the original objective function part
-            dR_dq_AL, dR_dq_AC = compute_dR_dq(calc_source, self.sat, attitude, t_L)
-
-            dR_da_m_AL = dR_da_i(dR_dq_AL, self.att_bases[m_index, obs_time_index])
-            dR_da_m_AC = dR_da_i(dR_dq_AC, self.att_bases[m_index, obs_time_index])
-
-            dR_da_n_AL = dR_da_i(dR_dq_AL, self.att_bases[n_index, obs_time_index])
-            dR_da_n_AC = dR_da_i(dR_dq_AC, self.att_bases[n_index, obs_time_index])
+            dR_dq_AL_arr[i], dR_dq_AC_arr[i] = compute_dR_dq(calc_source, self.sat, attitude, t_L)
 
-            Naa_mn += regularisation_part + dR_da_n_AL @ dR_da_m_AL.T + dR_da_n_AC @ dR_da_m_AC.T
-
-            if self.verbose:
-                if m_index >= 0:
-                    if i >= 0:
-                        print('**** m:', m_index, '**** n:', n_index, '**** i:', i)
-                        print('dR_dq: ', dR_dq)
-                        print('dR_da_m', dR_da_m)
-                        print('dR_da_n', dR_da_n)
-                        print('Naa_mn', Naa_mn)
-        return Naa_mn
+        return accumulate_Naa_mn(bases_n, bases_m, dDL_n, dDL_m, dR_dq_AL_arr, dR_dq_AC_arr,
+                                 self.attitude_regularisation_factor)
 
     # ### Sparse implementation of attitude update-----
     def compute_attitude_banded_derivative_and_regularisation_matrices(self):
@@ -571,18 +809,15 @@ class Agis:
     def compute_matrix_dD_da_mn(self, m_index, n_index):
         """compute $lambda^2 dD/da_m * dD/da_n^T$ (i.e. wrt coeffs)"""
         dD_da_mn = np.zeros((4, 4))
-        time_support_spline_m = get_times_in_knot_interval(self.all_obs_times, self.att_knots, m_index, self.M)
-        time_support_spline_n = get_times_in_knot_interval(self.all_obs_times, self.att_knots, n_index, self.M)
-        time_support_spline_mn = np.sort(helpers.get_lists_intersection(time_support_spline_m, time_support_spline_n))
+        time_support_spline_mn = get_times_in_knot_intervals_intersection(self.all_obs_times, self.att_knots,
+                                                                           m_index, n_index, self.M)
 
+        cbs_all, D_L_all = self.get_coeff_basis_sums()
         for i, t_L in enumerate(time_support_spline_mn):
-            left_index = get_left_index(self.att_knots, t=t_L, M=self.M)
-            obs_time_index = list(self.all_obs_times).index(t_L)
+            obs_time_index = self._obs_index[t_L]
             # Compute the regulation part
-            coeff_basis_sum = compute_coeff_basis_sum(self.att_coeffs, self.att_bases,
-                                                      left_index, self.M, obs_time_index)
-            dDL_da_n = compute_DL_da_i(coeff_basis_sum, self.att_bases, obs_time_index, n_index)
-            dDL_da_m = compute_DL_da_i(coeff_basis_sum, self.att_bases, obs_time_index, m_index)
+            dDL_da_n = compute_DL_da_i(cbs_all[obs_time_index], self.att_bases, obs_time_index, n_index)
+            dDL_da_m = compute_DL_da_i(cbs_all[obs_time_index], self.att_bases, obs_time_index, m_index)
             dD_da_mn += self.attitude_regularisation_factor**2 * dDL_da_n @ dDL_da_m.T
 
         return dD_da_mn
@@ -590,15 +825,14 @@ class Agis:
     def compute_matrix_dR_da_mn(self, m_index, n_index):
         """compute dR/da (i.e. wrt coeffs)"""
         dR_da_mn = np.zeros((4, 4))
-        time_support_spline_m = get_times_in_knot_interval(self.all_obs_times, self.att_knots, m_index, self.M)
-        time_support_spline_n = get_times_in_knot_interval(self.all_obs_times, self.att_knots, n_index, self.M)
-        time_support_spline_mn = np.sort(helpers.get_lists_intersection(time_support_spline_m, time_support_spline_n))
+        time_support_spline_mn = get_times_in_knot_intervals_intersection(self.all_obs_times, self.att_knots,
+                                                                           m_index, n_index, self.M)
 
         for i, t_L in enumerate(time_support_spline_mn):
             # for i, t_L in enumerate(self.all_obs_times):
             calc_source = self.calc_sources[self.get_source_index(t_L)]
             attitude = self.get_attitude(t_L, unit=False)
-            obs_time_index = list(self.all_obs_times).index(t_L)
+            obs_time_index = self._obs_index[t_L]
 
             # Compute the original objective function part
             dR_dq_AL, dR_dq_AC = compute_dR_dq(calc_source, self.sat, attitude, t_L)
@@ -656,19 +890,11 @@ def C_du_ds_to_S_du_ds(self, source_index, C_du_ds):
     rotate the frame from CoRMS (lmn) to SRS (xyz) for du_ds
     """
     calc_source = self.calc_sources[source_index]
-    S_du_ds = np.zeros(C_du_ds.shape)
-
-    for j in range(C_du_ds.shape[-1]):  # TODO: remove these ugly for loop
-        t_L = calc_source.obs_times[j]
-        if self.updating == 'source':
-            attitude = self.get_attitude_for_source(source_index, t_L)
-        elif self.updating == 'scanned source':
-            attitude = self.sat.func_attitude(t_L)
-        else:  # attitude = self.get_attitude(t_L)
-            raise ValueError('Not yet implemented for this case')
-        for i in range(C_du_ds.shape[0]):  # TODO: remove these ugly for loop
-            S_du_ds[i, :, j] = ft.lmn_to_xyz(attitude, C_du_ds[i, :, j])
-    return S_du_ds
+    t_array = np.asarray(calc_source.obs_times)
+    attitude_array = self.get_source_update_attitude_array(source_index, t_array)
+    # The rotation matrices go from xyz to lmn; lmn -> xyz is their transpose
+    rot = ft.quat_to_matrix_array(attitude_array)
+    return np.einsum('jba,ibj->iaj', rot, C_du_ds)
 
 
 def du_ds(self, source_index, du_tilde_ds):
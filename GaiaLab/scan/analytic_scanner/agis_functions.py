@@ -39,6 +39,7 @@ from scipy.interpolate import BSpline
 from scipy.interpolate import splev
 import matplotlib.pyplot as plt
 import quaternion
+from numba import njit, prange
 # Local imports
 import constants as const
 import helpers as helpers
@@ -46,6 +47,12 @@ import frame_transformations as ft
 from source import Source
 from satellite import Satellite
 from source import compute_topocentric_direction
+from source import compute_topocentric_direction_array
+
+# Unit axes of the SRS frame, hoisted so the hot functions below do not
+# reallocate them on every call
+_X_AXIS = np.array([1.0, 0.0, 0.0])
+_Z_AXIS = np.array([0.0, 0.0, 1.0])
 
 
 def generate_observation_wrt_attitude(attitude):
@@ -76,7 +83,7 @@ def error_between_func_attitudes(my_times, func_att1, func_att2):
 
 def rotation_matrix_from_alpha_delta(source, sat, t):
     Cu = source.unit_topocentric_function(sat, t)
-    Su = np.array([1, 0, 0])
+    Su = _X_AXIS
     r = helpers.get_rotation_matrix(Cu, Su)
     return r
 
@@ -84,7 +91,7 @@ def rotation_matrix_from_alpha_delta(source, sat, t):
 def attitude_from_alpha_delta(source, sat, t, vertical_angle_dev=0):
     """:param vertical_angle_dev: how much we deviate from zeta"""
     Cu = source.unit_topocentric_function(sat, t)
-    Su = np.array([1, 0, 0])
+    Su = _X_AXIS
     if vertical_angle_dev == 0:
         vector, angle = helpers.get_rotation_vector_and_angle(Cu, Su)
         q_out = quaternion.from_rotation_vector(angle*vector)
@@ -102,9 +109,27 @@ def attitude_from_alpha_delta(source, sat, t, vertical_angle_dev=0):
     return q_out
 
 
+def attitude_from_alpha_delta_array(source, sat, t_array):
+    """
+    Batched version of :func:`attitude_from_alpha_delta` for an array of times
+    (only for the default case without vertical angle deviation).
+    :param t_array: [1D array][days]
+    :returns: (N, 4) array of unit quaternions (w, x, y, z)
+    """
+    Cu = source.unit_topocentric_function_array(sat, t_array)  # (N, 3)
+    Su = _X_AXIS
+    angles = np.arccos(Cu @ Su)
+    vectors = np.cross(Cu, Su[np.newaxis, :])
+    vectors = vectors / np.linalg.norm(vectors, axis=1)[:, np.newaxis]
+    attitude_array = np.empty((len(angles), 4))
+    attitude_array[:, 0] = np.cos(angles / 2)
+    attitude_array[:, 1:4] = np.sin(angles / 2)[:, np.newaxis] * vectors
+    return attitude_array
+
+
 def spin_axis_from_alpha_delta(source, sat, t):
     Cu = source.unit_topocentric_function(sat, t)
-    Su = np.array([1, 0, 0])
+    Su = _X_AXIS
     vector, angle = helpers.get_rotation_vector_and_angle(Cu, Su)
     # vector = vector/np.linalg.norm(vector)
     # satellite_position = sat.ephemeris_bcrs(t)
@@ -133,14 +158,14 @@ def get_angular_FFoV_PFoV(sat, t):
     return angular positions (alpha, delta) of the fields of view as a
     function of time.
     """
-    z_axis = np.array([0, 0, 1])
+    z_axis = _Z_AXIS
     attitude = sat.func_attitude(t)
 
     quat_PFoV = quaternion.from_rotation_vector(z_axis*const.Gamma_c / 2)
     quat_FFoV = quaternion.from_rotation_vector(z_axis*(-const.Gamma_c / 2))
 
-    PFoV_SRS = ft.rotate_by_quaternion(quat_PFoV, np.array([1, 0, 0]))
-    FFoV_SRS = ft.rotate_by_quaternion(quat_FFoV, np.array([1, 0, 0]))
+    PFoV_SRS = ft.rotate_by_quaternion(quat_PFoV, _X_AXIS)
+    FFoV_SRS = ft.rotate_by_quaternion(quat_FFoV, _X_AXIS)
 
     PFoV_CoMRS = ft.xyz_to_lmn(attitude, PFoV_SRS)
     FFoV_CoMRS = ft.xyz_to_lmn(attitude, FFoV_SRS)
@@ -154,28 +179,21 @@ def get_angular_FFoV_PFoV(sat, t):
 # ### For scanner --------------------------------------------------------------
 def get_interesting_days(ti, tf, sat, source, zeta_limit):
     # print(zeta_limit)
-    day_list = []
     zeta_limit = min(zeta_limit*6, 3)  # why *6 ?? [rad]
     time_step = 1
     days = np.arange(ti, tf, time_step)
-    for t in days:
-        attitude = sat.func_attitude(t)
-        eta, zeta = observed_field_angles(source, attitude, sat, t)
-        if np.abs(zeta) < zeta_limit:
-            day_list.append(t)
-
-    return day_list
+    _, _, zeta = field_angles_and_phi_array(source, sat, days)
+    return list(days[np.abs(zeta) < zeta_limit])
 
 
 def generate_scanned_times_intervals(day_list, time_step):
     extend_by = 1
-    previous_days = list(np.array(day_list)-extend_by)
-    extended_days = set(day_list + previous_days)
-    scanned_intervals = []
-    for day in day_list:
-        scanned_intervals += list(np.arange(day, day+extend_by, time_step))
-    scanned_intervals = list(set(scanned_intervals))
-    return scanned_intervals
+    if not len(day_list):
+        return np.array([])
+    scanned_intervals = np.concatenate([np.arange(day, day+extend_by, time_step)
+                                        for day in day_list])
+    # np.unique deduplicates in C and returns the intervals sorted
+    return np.unique(scanned_intervals)
 
 
 # ### End for scanner ##########################################################
@@ -291,6 +309,27 @@ def get_times_in_knot_interval(time_array, knots, index, M):
     return time_array[(knots[index] < time_array) & (time_array < knots[index+M])]
 
 
+def get_times_in_knot_intervals_intersection(time_array, knots, m, n, M):
+    """
+    Times in the intersection of the supports of splines m and n, i.e. in
+    ]knots[max(m, n)], knots[min(m, n)+M][. Equivalent to intersecting the two
+    outputs of :func:`get_times_in_knot_interval` but obtained by interval
+    arithmetic on the sorted time array instead of a list intersection.
+
+    :param time_array: [numpy array] sorted observation times
+    :param knots: [numpy array] knots of the spline
+    :param m: [int] index of the first spline
+    :param n: [int] index of the second spline
+    :param M: [int] spline order (k+1)
+    :return: sorted times in the intersection of both supports
+    """
+    low = knots[max(m, n)]
+    high = knots[min(m, n) + M]
+    i_0 = np.searchsorted(time_array, low, side='right')
+    i_1 = np.searchsorted(time_array, high, side='left')
+    return time_array[i_0:i_1]
+
+
 def get_left_index(knots, t, M):
     """
     :param M: spline order (k+1)
@@ -376,10 +415,89 @@ def dR_da_i(dR_dq, bases_i):
     """ :param basis_i: B-spline basis of index i"""
     dR_da_i = dR_dq * bases_i
     return dR_da_i.reshape(4, 1)
+
+
+@njit(cache=True)
+def accumulate_Naa_mn(bases_n, bases_m, dDL_n, dDL_m, dR_dq_AL, dR_dq_AC, reg_factor):
+    """
+    Jitted accumulation of one (4, 4) block of the attitude normal matrix,
+    i.e. the inner loop of Agis.compute_Naa_mn with the per-observation
+    quantities already gathered into plain arrays.
+
+    :param bases_n: [array] (N_t,) basis of spline n at the support times
+    :param bases_m: [array] (N_t,) basis of spline m at the support times
+    :param dDL_n: [array] (N_t, 4) dD_L/da_n at the support times
+    :param dDL_m: [array] (N_t, 4) dD_L/da_m at the support times
+    :param dR_dq_AL: [array] (N_t, 4) AL residual derivative wrt attitude
+    :param dR_dq_AC: [array] (N_t, 4) AC residual derivative wrt attitude
+    :param reg_factor: [float] attitude regularisation factor
+    :returns: [array] (4, 4) accumulated block
+    """
+    Naa_mn = np.zeros((4, 4))
+    for i in range(bases_n.shape[0]):
+        for a in range(4):
+            for b in range(4):
+                Naa_mn[a, b] += reg_factor**2 * dDL_n[i, a] * dDL_m[i, b] \
+                    + (dR_dq_AL[i, a] * bases_n[i]) * (dR_dq_AL[i, b] * bases_m[i]) \
+                    + (dR_dq_AC[i, a] * bases_n[i]) * (dR_dq_AC[i, b] * bases_m[i])
+    return Naa_mn
+
+
+@njit(cache=True)
+def accumulate_attitude_rhs_n(bases_n, dDL_n, D_L, dR_dq_AL, dR_dq_AC, R_AL, R_AC, reg_factor):
+    """
+    Jitted accumulation of one (4, 1) block of the attitude right-hand side,
+    i.e. the inner loop of Agis.compute_attitude_RHS_n with the
+    per-observation quantities already gathered into plain arrays.
+
+    :param bases_n: [array] (N_t,) basis of spline n at the support times
+    :param dDL_n: [array] (N_t, 4) dD_L/da_n at the support times
+    :param D_L: [array] (N_t,) attitude deviations from unity
+    :param dR_dq_AL: [array] (N_t, 4) AL residual derivative wrt attitude
+    :param dR_dq_AC: [array] (N_t, 4) AC residual derivative wrt attitude
+    :param R_AL: [array] (N_t,) along-scan residuals
+    :param R_AC: [array] (N_t,) across-scan residuals
+    :param reg_factor: [float] attitude regularisation factor
+    :returns: [array] (4, 1) accumulated block (already negated)
+    """
+    rhs = np.zeros((4, 1))
+    for i in range(bases_n.shape[0]):
+        for a in range(4):
+            rhs[a, 0] += reg_factor**2 * dDL_n[i, a] * D_L[i] \
+                + (dR_dq_AL[i, a] * bases_n[i]) * R_AL[i] \
+                + (dR_dq_AC[i, a] * bases_n[i]) * R_AC[i]
+    return -rhs
 # ### End attitude updating ####################################################
 
 
 # ### Beginning field angles and associated functions --------------------------
+@njit(cache=True)
+def compute_field_angles_core(qw, qx, qy, qz, cu_x, cu_y, cu_z, Gamma_c):
+    """
+    Ref. Paper eq. [9], [12]-[13]
+    Scalar kernel for the field angles: rotate the CoMRS direction into the
+    SRS frame with the inverse of the attitude quaternion and read off the
+    angles, without allocating numpy temporaries. The correction terms are
+    scaled by 1/|q|^2 so the rotation is exact also for the non-unit
+    attitudes fed in by the attitude-update path (unit=False).
+    :returns: (eta, zeta)
+    """
+    # u x v and u x (u x v) with u = (-qx, -qy, -qz) the conjugate vector part
+    ux, uy, uz = -qx, -qy, -qz
+    inv_n2 = 1.0 / (qw * qw + qx * qx + qy * qy + qz * qz)
+    cx = uy * cu_z - uz * cu_y
+    cy = uz * cu_x - ux * cu_z
+    cz = ux * cu_y - uy * cu_x
+    Su_x = cu_x + (2 * qw * cx + 2 * (uy * cz - uz * cy)) * inv_n2
+    Su_y = cu_y + (2 * qw * cy + 2 * (uz * cx - ux * cz)) * inv_n2
+    Su_z = cu_z + (2 * qw * cz + 2 * (ux * cy - uy * cx)) * inv_n2
+
+    phi = np.arctan2(Su_y, Su_x)
+    zeta = np.arctan2(Su_z, np.sqrt(Su_x**2 + Su_y**2))
+    eta = phi - np.sign(phi) * Gamma_c / 2
+    return eta, zeta
+
+
 def observed_field_angles(source, attitude, sat, t, double_telescope=False):
     """
     Ref. Paper eq. [12]-[13]
@@ -388,9 +506,11 @@ def observed_field_angles(source, attitude, sat, t, double_telescope=False):
     zeta: across-scan field angle
     """
     Cu = source.unit_topocentric_function(sat, t)  # u in CoMRS frame
-    Su = ft.lmn_to_xyz(attitude, Cu)
+    Gamma_c = const.Gamma_c if double_telescope else 0
+    q = quaternion.as_float_array(attitude)
     # if double_telescope is False, it will return (phi, zeta)
-    eta, zeta = compute_field_angles(Su, double_telescope)
+    eta, zeta = compute_field_angles_core(q[0], q[1], q[2], q[3],
+                                          Cu[0], Cu[1], Cu[2], Gamma_c)
     return eta, zeta
 
 
@@ -404,9 +524,10 @@ def calculated_field_angles(calc_source, attitude, sat, t, double_telescope=Fals
     params = np.array([alpha, delta, parallax, mu_alpha, mu_delta, calc_source.mu_radial])
 
     Cu = compute_topocentric_direction(params, sat, t)  # u in CoMRS frame
-    Su = ft.lmn_to_xyz(attitude, Cu)  # u in SRS frame
-
-    eta, zeta = compute_field_angles(Su, double_telescope)
+    Gamma_c = const.Gamma_c if double_telescope else 0
+    q = quaternion.as_float_array(attitude)
+    eta, zeta = compute_field_angles_core(q[0], q[1], q[2], q[3],
+                                          Cu[0], Cu[1], Cu[2], Gamma_c)
     return eta, zeta
 
 
@@ -438,6 +559,141 @@ def compute_field_angles(Su, double_telescope=False):
     return eta, zeta
 
 
+def observed_field_angles_array(source, attitude_array, sat, t_array, double_telescope=False):
+    """
+    Ref. Paper eq. [12]-[13]
+    Batched version of :func:`observed_field_angles` for an array of times.
+    :param attitude_array: (N, 4) array of unit quaternions (w, x, y, z)
+    :param t_array: (N,) array of observation times [days]
+    :returns: (eta, zeta) as (N,) arrays
+    """
+    Cu = source.unit_topocentric_function_array(sat, t_array)  # u in CoMRS frame
+    Su = ft.lmn_to_xyz_array(attitude_array, Cu)
+    eta, zeta = compute_field_angles_array(Su, double_telescope)
+    return eta, zeta
+
+
+def calculated_field_angles_array(calc_source, attitude_array, sat, t_array, double_telescope=False):
+    """
+    Ref. Paper eq. [12]-[13]
+    Batched version of :func:`calculated_field_angles` for an array of times.
+    :param attitude_array: (N, 4) array of unit quaternions (w, x, y, z)
+    :param t_array: (N,) array of observation times [days]
+    :returns: (eta, zeta) as (N,) arrays
+    """
+    alpha, delta, parallax, mu_alpha, mu_delta = calc_source.s_params[:]
+    params = np.array([alpha, delta, parallax, mu_alpha, mu_delta, calc_source.mu_radial])
+    Cu = compute_topocentric_direction_array(params, sat, t_array)  # u in CoMRS frame
+    Su = ft.lmn_to_xyz_array(attitude_array, Cu)  # u in SRS frame
+    eta, zeta = compute_field_angles_array(Su, double_telescope)
+    return eta, zeta
+
+
+def compute_field_angles_array(Su_array, double_telescope=False):
+    """
+    Ref. Paper eq. [12]-[13]
+    Batched version of :func:`compute_field_angles`.
+    :param Su_array: (N, 3) array with the proper directions in the SRS reference system
+    :returns: (eta, zeta) as (N,) arrays
+    """
+    if not isinstance(Su_array, np.ndarray):
+        raise TypeError('Su_array has to be a numpy array, instead is {}'.format(type(Su_array)))
+    if Su_array.ndim != 2 or Su_array.shape[1] != 3:
+        raise ValueError('Shape of Su_array should be (N, 3), instead it is {}'.format(Su_array.shape))
+    if double_telescope:
+        Gamma_c = const.Gamma_c  # angle between the two scanners
+    else:
+        Gamma_c = 0
+    Su_x, Su_y, Su_z = Su_array[:, 0], Su_array[:, 1], Su_array[:, 2]
+
+    phi = np.arctan2(Su_y, Su_x)
+    zeta = np.arctan2(Su_z, np.sqrt(Su_x**2+Su_y**2))
+
+    field_index = np.sign(phi)
+    eta = phi - field_index * Gamma_c / 2
+    return eta, zeta
+
+
+def phi(source, sat, t):
+    """
+    Ref. Paper eq. [12]-[13]
+    Field angles of the source as seen with the satellite attitude at time t
+    (single telescope, i.e. the along-scan angle is phi itself).
+    :param source: [Source object]
+    :param sat: [Satellite object]
+    :param t: [float][days]
+    :returns: (phi, zeta) angles of the source
+    """
+    attitude = sat.func_attitude(t)
+    phi_value, zeta_value = observed_field_angles(source, attitude, sat, t)
+    return phi_value, zeta_value
+
+
+def phi_array(source, sat, t_array):
+    """
+    Ref. Paper eq. [12]-[13]
+    Batched version of :func:`phi` for an array of times.
+    :param t_array: [1D array][days]
+    :returns: (phi, zeta) as (N,) arrays
+    """
+    phi_angles, eta, zeta = field_angles_and_phi_array(source, sat, t_array)
+    return phi_angles, zeta
+
+
+@njit(parallel=True, cache=True)
+def compute_field_angles_core_array(attitude_array, cu_array, Gamma_c):
+    """
+    Ref. Paper eq. [9], [12]-[13]
+    Parallel batch version of :func:`compute_field_angles_core`: one prange
+    lane per time sample, each applying the inverse quaternion rotation
+    on scalars. Releases the GIL and scales across cores.
+    :param attitude_array: (N, 4) array of quaternions (w, x, y, z), not
+                           necessarily unit
+    :param cu_array: (N, 3) array of source directions in the CoMRS frame
+    :returns: (phi, eta, zeta) as (N,) arrays
+    """
+    n = attitude_array.shape[0]
+    phi = np.empty(n)
+    eta = np.empty(n)
+    zeta = np.empty(n)
+    for i in prange(n):
+        qw, qx, qy, qz = attitude_array[i, 0], attitude_array[i, 1], \
+            attitude_array[i, 2], attitude_array[i, 3]
+        cu_x, cu_y, cu_z = cu_array[i, 0], cu_array[i, 1], cu_array[i, 2]
+        ux, uy, uz = -qx, -qy, -qz
+        inv_n2 = 1.0 / (qw * qw + qx * qx + qy * qy + qz * qz)
+        cx = uy * cu_z - uz * cu_y
+        cy = uz * cu_x - ux * cu_z
+        cz = ux * cu_y - uy * cu_x
+        Su_x = cu_x + (2 * qw * cx + 2 * (uy * cz - uz * cy)) * inv_n2
+        Su_y = cu_y + (2 * qw * cy + 2 * (uz * cx - ux * cz)) * inv_n2
+        Su_z = cu_z + (2 * qw * cz + 2 * (ux * cy - uy * cx)) * inv_n2
+
+        phi[i] = np.arctan2(Su_y, Su_x)
+        zeta[i] = np.arctan2(Su_z, np.sqrt(Su_x**2 + Su_y**2))
+        eta[i] = phi[i] - np.sign(phi[i]) * Gamma_c / 2
+    return phi, eta, zeta
+
+
+def field_angles_and_phi_array(source, sat, t_array, double_telescope=False):
+    """
+    Ref. Paper eq. [12]-[13]
+    Fused kernel for the batched field angles: evaluate the attitude spline
+    once, rotate the source direction into the SRS frame once, and derive
+    phi, eta and zeta together from the rotated components. Callers keep
+    only the columns they need.
+    :param t_array: [1D array][days]
+    :returns: (phi, eta, zeta) as (N,) arrays
+    """
+    attitude_array = sat.func_attitude_array(t_array)
+    Cu = source.unit_topocentric_function_array(sat, t_array)  # u in CoMRS frame
+    if double_telescope:
+        Gamma_c = const.Gamma_c
+    else:
+        Gamma_c = 0
+    return compute_field_angles_core_array(attitude_array, Cu, float(Gamma_c))
+
+
 def compute_mnu(phi, zeta):
     """
     Ref. Paper eq. [69]
@@ -449,6 +705,23 @@ def compute_mnu(phi, zeta):
     n_l = np.array([-np.sin(zeta)*np.cos(phi), np.sin(zeta)*np.sin(phi), np.cos(zeta)])
     u_l = np.array([np.cos(zeta)*np.cos(phi), np.cos(zeta)*np.sin(phi), np.sin(zeta)])
     return np.array([m_l, n_l, u_l])
+
+
+def compute_mnu_array(phi_array, zeta_array):
+    """
+    Ref. Paper eq. [69]
+    Batched version of :func:`compute_mnu` for arrays of field angles.
+    :param phi_array: [1D array] along-scan angles
+    :param zeta_array: [1D array] across-scan angles
+    :returns: (m, n, u) column vectors of S'[m_l, n_l, u_l], each as (N, 3)
+    """
+    zeros = np.zeros_like(phi_array)
+    m = np.stack([-np.sin(phi_array), np.cos(phi_array), zeros], axis=1)
+    n = np.stack([-np.sin(zeta_array)*np.cos(phi_array), np.sin(zeta_array)*np.sin(phi_array),
+                  np.cos(zeta_array)], axis=1)
+    u = np.stack([np.cos(zeta_array)*np.cos(phi_array), np.cos(zeta_array)*np.sin(phi_array),
+                  np.sin(zeta_array)], axis=1)
+    return m, n, u
 # ### End field angles and associated functions ################################
 
 
@@ -469,6 +742,20 @@ def compute_du_dparallax(r, b_G):
     update = -(np.eye(3) - r @ r.T) @ b_G / const.Au_per_Au
     update.shape = (3)  # This way it returns an error if it has to copy data
     return update  # np.ones(3)  #
+
+
+def compute_du_dparallax_array(r, b_G_array):
+    """Ref. Paper eq. [73]
+    Batched version of :func:`compute_du_dparallax` for an array of
+    barycentric ephemeris positions.
+    :param r: [array] (3, 1) direction vector of the source
+    :param b_G_array: [array] (3, N) barycentric positions of Gaia
+    :returns: [array] (N, 3) du/dw, one row per time
+    """
+    if r.shape != (3, 1):
+        raise ValueError('r.shape should be (3, 1), instead it is {}'.format(r.shape))
+    update = -(np.eye(3) - r @ r.T) @ b_G_array / const.Au_per_Au
+    return update.T
 # ###End source updating #######################################################
 
 
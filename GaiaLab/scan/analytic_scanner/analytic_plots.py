@@ -60,31 +60,25 @@ def plot_attitude(sat, ti, tf, n_points=1000, figsize=(9, 5)):
      function.
     """
     times = np.linspace(ti, tf, n_points)
-    attitudes = [sat.func_attitude(t) for t in times]
+    qw_list, qx_list, qy_list, qz_list = sat.func_attitude_array(times).T
 
-    qw_list = [obj.w for obj in attitudes]
-    qx_list = [obj.x for obj in attitudes]
-    qy_list = [obj.y for obj in attitudes]
-    qz_list = [obj.z for obj in attitudes]
-
-    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=figsize)
+    # Shared x axis so the tick computation for times happens only once;
+    # linspace also works when tf - ti < 4 days (arange step would be 0)
+    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, sharex=True, figsize=figsize)
     fig.subplots_adjust(left=0.2, wspace=0.6, hspace=1.5)
+    xticks = np.linspace(ti, tf, 5)
 
     ax1.plot(times, qw_list, 'r-')
-    ax1.set(title='W', xlabel='days', xlim=(ti, tf),
-            xticks=(np.arange(ti, tf+1, (tf+1-ti)//4)))
+    ax1.set(title='W', xlabel='days', xlim=(ti, tf), xticks=xticks)
 
     ax2.plot(times, qx_list, 'b-')
-    ax2.set(title='X', xlabel='days', xlim=(ti, tf),
-            xticks=(np.arange(ti, tf+1, (tf+1-ti)//4)))
+    ax2.set(title='X', xlabel='days', xlim=(ti, tf), xticks=xticks)
 
     ax3.plot(times, qy_list, 'g-')
-    ax3.set(title='Y', xlabel='days', xlim=(ti, tf),
-            xticks=(np.arange(ti, tf+1, (tf+1-ti)//4)))
+    ax3.set(title='Y', xlabel='days', xlim=(ti, tf), xticks=xticks)
 
     ax4.plot(times, qz_list, 'k-')
-    ax4.set(title='Z', xlabel='days', xlim=(ti, tf),
-            xticks=(np.arange(ti, tf+1, (tf+1-ti)//4)))
+    ax4.set(title='Z', xlabel='days', xlim=(ti, tf), xticks=xticks)
 
     plt.rcParams.update({'font.size': 22})
     plt.show()
@@ -98,23 +92,9 @@ def plot_star(source, satellite, scan):
     :return: plot of position of observations and their error bars.
     """
 
-    alphas_obs = []
-    deltas_obs = []
-    radius_obs = []
-
-    star_alphas = []
-    star_deltas = []
-    star_radius = []
-
-    z_alphas = []
-    z_deltas = []
-
     fig = plt.figure()
 
-    for i, t in enumerate(scan.obs_times):
-        source.set_time(t)
-        star_alphas.append(source.alpha)
-        star_deltas.append(source.delta)
+    star_alphas, star_deltas = source.alpha_delta_arrays(np.asarray(scan.obs_times))
 
     plt.plot(star_alphas, star_deltas, 'b*', label='star')
     plt.plot([star_alphas[0], star_alphas[-1]], [star_deltas[0], star_deltas[-1]], 'r-', alpha=0.2)
@@ -136,41 +116,31 @@ def plot_observations(source, satellite, scan):
     :param scan: scan object
     :return: plot of position of observations and their error bars.
     """
-    alphas_obs, deltas_obs, radius_obs = ([], [], [])
-    star_alphas, star_deltas, star_radius = ([], [], [])
-    z_alphas, z_deltas = ([], [])
-
-    green_alphas, green_deltas = ([], [])
-
     plt.figure()
-    # for each of the observed times we plot the position of the x-axis in lmn
-    # of the scanner
-    for i, t in enumerate(scan.obs_times):
+    # For each of the observed times, the position of the x-axis of the
+    # scanner in lmn, everything evaluated on the whole time vector at once
+    obs_times = np.asarray(scan.obs_times)
+    x_axes = satellite.func_x_axis_lmn_array(obs_times)
+    z_axes = satellite.func_z_axis_lmn_array(obs_times)
 
-        alpha, delta = ft.vector_to_alpha_delta(satellite.func_x_axis_lmn(t))
-        alphas_obs.append(alpha % (2 * np.pi))
-        deltas_obs.append(delta)
-        # radius_obs.append(radius)
-        source.set_time(t)
-        star_alphas.append(source.alpha)
-        star_deltas.append(source.delta)
-        # star_deltas.append(source.radius)
+    alphas_obs, deltas_obs = ft.vectors_to_alpha_delta(x_axes)
+    star_alphas, star_deltas = source.alpha_delta_arrays(obs_times)
 
-        xaxis = satellite.func_x_axis_lmn(t)
-        zaxis = satellite.func_z_axis_lmn(t)
+    vectorz1 = x_axes + scan.z_threshold * z_axes
+    vectorz2 = x_axes - scan.z_threshold * z_axes
 
-        vectorz1 = xaxis + scan.z_threshold * zaxis
-        vectorz2 = xaxis - scan.z_threshold * zaxis
+    z_alpha_1, z_delta_1 = ft.vectors_to_alpha_delta(vectorz1)
+    z_alpha_2, z_delta_2 = ft.vectors_to_alpha_delta(vectorz2)
 
-        z_alpha_1, z_delta_1 = ft.vector_to_alpha_delta(vectorz1)
-        z_alpha_2, z_delta_2 = ft.vector_to_alpha_delta(vectorz2)
+    z_alphas = np.column_stack([z_alpha_1, z_alpha_2])
+    z_deltas = np.column_stack([z_delta_1, z_delta_2])
 
-        z_alphas.append([z_alpha_1, z_alpha_2])
-        z_deltas.append([z_delta_1, z_delta_2])
-
-    # For each couple of ([alpha1,alpha2],[delta1,delta2])
-    for alpha_delta in zip(z_alphas, z_deltas):
-        plt.plot(alpha_delta[0], alpha_delta[1], 'yo-')
+    # One collection for all ([alpha1,alpha2],[delta1,delta2]) error bars
+    # instead of one Line2D artist per observation
+    segments = np.stack([z_alphas, z_deltas], axis=-1)  # (N, 2, 2)
+    ax = plt.gca()
+    ax.add_collection(mc.LineCollection(segments, colors='y', linewidths=1))
+    ax.scatter(z_alphas.ravel(), z_deltas.ravel(), color='y', s=20)
 
     plt.plot(alphas_obs, deltas_obs, 'ro', label='observations')  # plot observation as re dots
     plt.plot(star_alphas, star_deltas, 'b*', label='star')  # plot stars as blu stars
@@ -195,13 +165,6 @@ def plot_prediction_VS_reality(source, satellite, scan, num_observations=0, angl
     :return: plot of position of observations and their error bars.
     """
 
-    alphas_obs, deltas_obs, radius_obs = ([], [], [])
-
-    star_alphas, star_deltas, star_radius = ([], [], [])
-
-    z_alphas, z_deltas = ([], [])
-    predictions_alphas, predictions_deltas = ([], [])
-
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
 
     # Set the number of observations we want to plot
@@ -209,57 +172,34 @@ def plot_prediction_VS_reality(source, satellite, scan, num_observations=0, angl
         obs_times = scan.obs_times[0:num_observations]
     else:
         obs_times = scan.obs_times
-    # for each of the observed times we plot the position of the x-axis in lmn
-    # of the scanner
-    for i, t in enumerate(obs_times):
-
-        alpha, delta = ft.vector_to_alpha_delta(satellite.func_x_axis_lmn(t))
-        alphas_obs.append(alpha % (2 * np.pi))
-        deltas_obs.append(delta)
-        # radius_obs.append(radius)
-        source.set_time(t)
-        star_alphas.append(source.alpha)
-        star_deltas.append(source.delta)
-        # star_deltas.append(source.radius)
-
-        # Axis of the satellite in the lmn frame
-        xaxis = satellite.func_x_axis_lmn(t)
-        zaxis = satellite.func_z_axis_lmn(t)
-
-        # Vectors describing the endpoints of the interval in which the source must be
-        # first in the lmn frame then in the polar one
-        vectorz1 = xaxis + scan.z_threshold * zaxis
-        z_alpha_1, z_delta_1 = ft.vector_to_alpha_delta(vectorz1)
-        vectorz2 = xaxis - scan.z_threshold * zaxis
-        z_alpha_2, z_delta_2 = ft.vector_to_alpha_delta(vectorz2)
-
-        z_alphas.append([z_alpha_1, z_alpha_2])
-        z_deltas.append([z_delta_1, z_delta_2])
-
-    # For each couple of ([alpha1,alpha2],[delta1,delta2])
-    alphas_deltas = list(zip(z_alphas, z_deltas))
-    for i in range(len(alphas_deltas)-1):
-        x1_x2, y1_y2 = alphas_deltas[i]
-        x3_x4, y3_y4 = alphas_deltas[i+1]
-
-        # compute dot product between the two segments
-        dot_product = np.dot([x1_x2[0]-x1_x2[1], y1_y2[0]-y1_y2[1]],
-                             [x3_x4[0]-x3_x4[1], y3_y4[0]-y3_y4[1]])
-        angle = helpers.compute_angle([x1_x2[0]-x1_x2[1], y1_y2[0]-y1_y2[1]],
-                                      [x3_x4[0]-x3_x4[1], y3_y4[0]-y3_y4[1]])
-        # print('angle: ', angle)
-        if angle < angle_tolerance:
-            continue
-        # compute the intersection between observations
-        intersection, error_msg = helpers.compute_intersection(x1_x2[0], y1_y2[0],
-                                                               x1_x2[1], y1_y2[1],
-                                                               x3_x4[0], y3_y4[0],
-                                                               x3_x4[1], y3_y4[1])
-        # print(error_msg)
-
-        if not error_msg:
-            predictions_alphas.append(intersection[0])
-            predictions_deltas.append(intersection[1])
+    obs_times = np.asarray(obs_times)
+    # For each of the observed times, the position of the x-axis of the
+    # scanner in lmn, everything evaluated on the whole time vector at once
+    x_axes = satellite.func_x_axis_lmn_array(obs_times)
+    z_axes = satellite.func_z_axis_lmn_array(obs_times)
+
+    alphas_obs, deltas_obs = ft.vectors_to_alpha_delta(x_axes)
+    star_alphas, star_deltas = source.alpha_delta_arrays(obs_times)
+
+    # Vectors describing the endpoints of the interval in which the source
+    # must be, first in the lmn frame then in the polar one
+    vectorz1 = x_axes + scan.z_threshold * z_axes
+    z_alpha_1, z_delta_1 = ft.vectors_to_alpha_delta(vectorz1)
+    vectorz2 = x_axes - scan.z_threshold * z_axes
+    z_alpha_2, z_delta_2 = ft.vectors_to_alpha_delta(vectorz2)
+
+    z_alphas = np.column_stack([z_alpha_1, z_alpha_2])
+    z_deltas = np.column_stack([z_delta_1, z_delta_2])
+
+    # Intersections of the error bars of consecutive observations, for all
+    # the couples of ([alpha1,alpha2],[delta1,delta2]) at once
+    segs = np.stack([z_alphas, z_deltas], axis=-1)  # (N, 2, 2)
+    directions = segs[:, 0, :] - segs[:, 1, :]
+    angles = helpers.compute_angles_array(directions[:-1], directions[1:])
+    points, valid = helpers.compute_intersections_array(segs[:-1], segs[1:])
+    keep = valid & (angles >= angle_tolerance)
+    predictions_alphas = points[keep, 0]
+    predictions_deltas = points[keep, 1]
 
     # Plot the prediction of the positions of the stars as being the intersection of
     # the error bands of the observations
@@ -278,8 +218,14 @@ def plot_prediction_VS_reality(source, satellite, scan, num_observations=0, angl
         # ax.set_tight_layout()
         ax.margins(0.1)
 
-    for i, alpha_delta in enumerate(zip(z_alphas, z_deltas)):
-        ax1.plot(alpha_delta[0], alpha_delta[1], 'o-', label='obs_'+str(i))  # ,'yo-'
+    # One collection for all the observation error bars, colored per
+    # observation, instead of one Line2D artist per observation
+    segments = np.stack([z_alphas, z_deltas], axis=-1)  # (N, 2, 2)
+    lc = mc.LineCollection(segments, linewidths=1, cmap='viridis', label='observations')
+    lc.set_array(np.arange(len(segments)))
+    ax1.add_collection(lc)
+    ax1.scatter(z_alphas.ravel(), z_deltas.ravel(), s=15, cmap='viridis',
+                c=np.repeat(np.arange(len(segments)), 2))
 
     ax1.legend()
     ax2.legend()
@@ -289,12 +235,7 @@ def plot_prediction_VS_reality(source, satellite, scan, num_observations=0, angl
 def plot_phi(source, sat, ti=0, tf=90, n=1000):
     styles = ['b.--', 'r.']
     times_total = np.linspace(ti, tf, n)
-    phi_list = []
-    eta_list = []
-    for t in times_total:
-        phi_value, eta_value = phi(source, sat, t)
-        eta_list.append(eta_value)
-        phi_list.append(phi_value)
+    phi_list, eta_list = phi_array(source, sat, times_total)
 
     fig1 = plt.figure(1)
     plt.plot(times_total, phi_list, styles[0])
@@ -317,22 +258,11 @@ def plot_field_angles(source, sat, obs_times=[], ti=0, tf=90, n=1000, limit=Fals
     eta_limit = np.radians(0.5)
     y_limit = (-zeta_limit*10, zeta_limit*10)
     times_total = np.linspace(ti, tf, n)
-    eta_list = []
-    zeta_list = []
-    zeta_sol_list = []
-    eta_sol_list = []
-    for t in times_total:
-        attitude = sat.func_attitude(t)
-        attitude = attitude_from_alpha_delta(source, sat, t)
-        eta_value, zeta_value = observed_field_angles(source, attitude, sat, t)
-        eta_list.append(eta_value)
-        zeta_list.append(zeta_value)
-    for t in obs_times:
-        attitude = sat.func_attitude(t)
-        attitude = attitude_from_alpha_delta(source, sat, t)
-        eta_value, zeta_value = observed_field_angles(source, attitude, sat, t)
-        eta_sol_list.append(eta_value)
-        zeta_sol_list.append(zeta_value)
+    obs_times = np.asarray(obs_times)
+    attitude_array = attitude_from_alpha_delta_array(source, sat, times_total)
+    eta_list, zeta_list = observed_field_angles_array(source, attitude_array, sat, times_total)
+    attitude_sol_array = attitude_from_alpha_delta_array(source, sat, obs_times)
+    eta_sol_list, zeta_sol_list = observed_field_angles_array(source, attitude_sol_array, sat, obs_times)
 
     zeta_fig = plt.figure(1)
     plt.plot(times_total, zeta_list, styles[0], label='zeta path', alpha=0.5)
@@ -373,18 +303,9 @@ def plot_phi_solutions(source, sat, obs_times, ti=0, tf=90, n=1000):
     eta_limit = np.radians(0.5)
     y_limit = (-phi_limit*10, phi_limit*10)
     times_total = np.linspace(ti, tf, n)
-    phi_list = []
-    eta_list = []
-    phi_sol_list = []
-    eta_sol_list = []
-    for t in times_total:
-        phi_value, eta_value = phi(source, sat, t)
-        eta_list.append(eta_value)
-        phi_list.append(phi_value)
-    for t in obs_times:
-        phi_value, eta_value = phi(source, sat, t)
-        eta_sol_list.append(eta_value)
-        phi_sol_list.append(phi_value)
+    obs_times = np.asarray(obs_times)
+    phi_list, _, eta_list = field_angles_and_phi_array(source, sat, times_total)
+    phi_sol_list, _, eta_sol_list = field_angles_and_phi_array(source, sat, obs_times)
 
     fig1 = plt.figure(1)
     plt.plot(times_total, phi_list, styles[0], label='phi path', alpha=0.5)
@@ -419,12 +340,7 @@ def plot_phi_solutions(source, sat, obs_times, ti=0, tf=90, n=1000):
 
 def plot_eta_over_phi(source, sat, ti=0, tf=90, n=1000):
     times_total = np.linspace(ti, tf, n)
-    phi_list = []
-    eta_list = []
-    for t in times_total:
-        phi_value, eta_value = phi(source, sat, t)
-        eta_list.append(eta_value)
-        phi_list.append(phi_value)
+    phi_list, eta_list = phi_array(source, sat, times_total)
 
     plt.figure(1)
     plt.plot(phi_list, eta_list, 'b,')
@@ -436,12 +352,7 @@ def plot_eta_over_phi(source, sat, ti=0, tf=90, n=1000):
 
 def plot_eta_over_phi_day(source, sat, ti=0, tf=90, n=1000, day=45):
     times_total = np.linspace(ti, tf, n)
-    phi_list = []
-    eta_list = []
-    for t in times_total:
-        phi_value, eta_value = phi(source, sat, t)
-        eta_list.append(eta_value)
-        phi_list.append(phi_value)
+    phi_list, eta_list = phi_array(source, sat, times_total)
     phi_actual, eta_actual = phi(source, sat, day)
 
     p = plt.figure(1)
@@ -463,29 +374,18 @@ def plot_stars_trajectory(source, sat, obs_times=[], equatorial=False):
     """
     time_total = sat.storage[-1][0]
 
-    alphas = []
-    deltas = []
-    alphas_sol = []
-    deltas_sol = []
-    times_sol = []
-
-    for i in np.arange(0, time_total, 1):
-        alpha, delta, delta_alpha_dx_mas, delta_delta_mas = source.topocentric_angles(sat, i)
-        if equatorial is False:
-            alphas.append(delta_alpha_dx_mas)
-            deltas.append(delta_delta_mas)
-        else:
-            alphas.append(alpha)
-            deltas.append(delta)
-    for t in obs_times:
-        times_sol.append(t/const.days_per_year + 2000)  # +2000 do the fact that the reference epoch is J2000
-        alpha_obs, delta_obs, delta_alpha_dx_mas, delta_delta_mas = source.topocentric_angles(sat, t)
-        if equatorial is False:
-            alphas_sol.append(delta_alpha_dx_mas)
-            deltas_sol.append(delta_delta_mas)
-        else:
-            alphas_sol.append(alpha_obs)
-            deltas_sol.append(delta_obs)
+    obs_times = np.asarray(obs_times)
+    path_times = np.arange(0, time_total, 1)
+    path_angles = source.topocentric_angles_array(sat, path_times)
+    sol_angles = source.topocentric_angles_array(sat, obs_times)
+    # +2000 due to the fact that the reference epoch is J2000
+    times_sol = obs_times/const.days_per_year + 2000
+    if equatorial is False:
+        alphas, deltas = path_angles[2], path_angles[3]
+        alphas_sol, deltas_sol = sol_angles[2], sol_angles[3]
+    else:
+        alphas, deltas = path_angles[0], path_angles[1]
+        alphas_sol, deltas_sol = sol_angles[0], sol_angles[1]
     n = len(alphas)
     times = np.linspace(2000, 2000 + time_total/const.days_per_year, n)
 
@@ -494,6 +394,10 @@ def plot_stars_trajectory(source, sat, obs_times=[], equatorial=False):
     origin_style = 'ks'
     sol_style = 'rs'
 
+    # Chunk long paths in the Agg backend and rasterize the dense artists so
+    # pan/zoom and vector-format saves stay cheap for multi-year missions
+    mpl.rcParams['agg.path.chunksize'] = 10000
+
     fig = plt.figure(figsize=(16, 9))
     ax = fig.add_subplot(121)
 
@@ -502,17 +406,26 @@ def plot_stars_trajectory(source, sat, obs_times=[], equatorial=False):
                  % (source.parallax*1e6, source.mu_alpha_dx*1e6, source.mu_delta*1e6),
                  fontsize=20)
     # cmaps: 'jet', 'winter', 'viridis'
-    ax.scatter(alphas, deltas, c=times, marker='.', s=(72./fig.dpi)**2, cmap='jet', alpha=0.5,
-               label=r'%s path' % (source.name), lw=2)
+    # One LineCollection colored by time instead of a multi-color scatter,
+    # so the colormap lookup happens once instead of on every redraw
+    points = np.stack([alphas, deltas], axis=-1)
+    segments = np.stack([points[:-1], points[1:]], axis=1)  # (N-1, 2, 2)
+    lc = mc.LineCollection(segments, cmap='jet', alpha=0.5, lw=2,
+                           label=r'%s path' % (source.name), rasterized=True)
+    lc.set_array(times[:-1])
+    ax.add_collection(lc)
+    ax.autoscale()
 
     # ax.plot(alphas, deltas, path_style, label=r'%s path' % (source.name), lw=2)
 
     ax.plot(alphas[0], deltas[0], origin_style, label='origin')
     ax.plot(alphas_sol, deltas_sol, sol_style, label='solutions')
 
+    alphas_min, alphas_max = np.min(alphas), np.max(alphas)
+    deltas_min, deltas_max = np.min(deltas), np.max(deltas)
     scaling_factor = 1 / 4
-    scale_alpha = (np.max(alphas) - np.min(alphas)) * scaling_factor
-    scale_delta = (np.max(deltas) - np.min(deltas)) * scaling_factor
+    scale_alpha = (alphas_max - alphas_min) * scaling_factor
+    scale_delta = (deltas_max - deltas_min) * scaling_factor
     length = np.array([scale_alpha, scale_delta])
     if equatorial is True:
         for i, (t, a, d) in enumerate(zip(obs_times, alphas_sol, deltas_sol)):
@@ -533,14 +446,14 @@ def plot_stars_trajectory(source, sat, obs_times=[], equatorial=False):
         ax.set_xlabel(r'$\Delta\alpha*$ [mas]')
         ax.set_ylabel(r'$\Delta\delta$ [mas]')
     else:
-        ax.set_xlim(np.min(alphas), np.max(alphas))
-        ax.set_ylim(np.min(deltas), np.max(deltas))
+        ax.set_xlim(alphas_min, alphas_max)
+        ax.set_ylim(deltas_min, deltas_max)
         ax.set_xlabel(r'$\alpha*$ [rad]')
         ax.set_ylabel(r'$\delta$ [rad]')
     ax.legend(fontsize=12, facecolor='#000000', framealpha=0.1)
     # Top right subplot
     ax1dra = fig.add_subplot(222)
-    ax1dra.plot(times, alphas, path_style)
+    ax1dra.plot(times, alphas, path_style, rasterized=True)
     ax1dra.plot(times[0], alphas[0], origin_style, label='origin')
     ax1dra.plot(times_sol, alphas_sol, sol_style, label='solutions')
     if equatorial is False:
@@ -552,7 +465,7 @@ def plot_stars_trajectory(source, sat, obs_times=[], equatorial=False):
     ax1ddec = fig.add_subplot(224, sharex=ax1dra)
     if equatorial is False:
         ax1ddec.axhline(y=0, c='gray', lw=1)
-    ax1ddec.plot(times, deltas, path_style)
+    ax1ddec.plot(times, deltas, path_style, rasterized=True)
     ax1ddec.plot(times[0], deltas[0], origin_style, label='origin')
     ax1ddec.plot(times_sol, deltas_sol, sol_style, label='solutions')
     ax1ddec.set_xlabel(r'Time [yr]')
@@ -573,21 +486,12 @@ def plot_stars_trajectory_3D(source, satellite, obs_times=[]):
 
     time_total = satellite.storage[-1][0]
 
-    alphas = []
-    deltas = []
-    alphas_sol = []
-    deltas_sol = []
-    times_sol = []
-
-    for i in np.arange(0, time_total, 1):
-        alpha_obs, delta_obs, delta_alpha_dx_mas, delta_delta_mas = source.topocentric_angles(satellite, i)
-        alphas.append(delta_alpha_dx_mas)
-        deltas.append(delta_delta_mas)
-    for t in obs_times:
-        alpha_obs, delta_obs, delta_alpha_dx_mas, delta_delta_mas = source.topocentric_angles(satellite, t)
-        alphas_sol.append(delta_alpha_dx_mas)
-        deltas_sol.append(delta_delta_mas)
-        times_sol.append(t/const.days_per_year + 2000)  # +2000 do the fact that the reference epoch is J2000
+    obs_times = np.asarray(obs_times)
+    path_times = np.arange(0, time_total, 1)
+    _, _, alphas, deltas = source.topocentric_angles_array(satellite, path_times)
+    _, _, alphas_sol, deltas_sol = source.topocentric_angles_array(satellite, obs_times)
+    # +2000 due to the fact that the reference epoch is J2000
+    times_sol = obs_times/const.days_per_year + 2000
 
     n = len(alphas)
     times = np.linspace(2000, 2000 + time_total/const.days_per_year, n)
@@ -597,6 +501,8 @@ def plot_stars_trajectory_3D(source, satellite, obs_times=[]):
     origin_style = 'kx'
     sol_style = 'rs'
 
+    mpl.rcParams['agg.path.chunksize'] = 10000
+
     fig = plt.figure(figsize=(16, 9))
     ax = fig.gca(projection='3d')
 
@@ -605,7 +511,7 @@ def plot_stars_trajectory_3D(source, satellite, obs_times=[]):
                  fontsize=20)
 
     ax.plot(alphas, deltas, times, path_style,
-            label=r'%s path' % (source.name), lw=2)
+            label=r'%s path' % (source.name), lw=2, rasterized=True)
     ax.plot(alphas_sol, deltas_sol, times_sol, sol_style,
             label=r'%s path' % (source.name), lw=2)
     # ax.plot(alphas[0], deltas[0], times[0], origin_style, label='origin')
@@ -649,17 +555,15 @@ def plot_3D_scanner_pos(sat, axis, ti, tf, n_points=1000, elevation=10, azimuth=
 
     times = np.linspace(ti, tf, n_points)
     if axis == 'X':
-        axis_list = [sat.func_x_axis_lmn(t) for t in times]
+        axis_array = sat.func_x_axis_lmn_array(times)
         label_ = 'X vector rotation'
         style_ = 'b,'
     elif axis == 'Z':
-        axis_list = [sat.func_z_axis_lmn(t) for t in times]
+        axis_array = sat.func_z_axis_lmn_array(times)
         label_ = 'Z vector rotation'
         style_ = 'r,'
 
-    listx = [i[0] for i in axis_list]
-    listy = [i[1] for i in axis_list]
-    listz = [i[2] for i in axis_list]
+    listx, listy, listz = axis_array.T
 
     mpl.rcParams['legend.fontsize'] = 10
 
@@ -693,11 +597,12 @@ def plot_longitud_latitude(sat, ti, tf, dt):
 
     sat.reset(ti, tf, dt)
     # sat.__create_storage(ti, tf, dt)
-    long_list = [i[5] % (2 * np.pi) for i in sat.storage]
-    alt_list = [i[6] for i in sat.storage]
+    storage = np.asarray(sat.storage, dtype=object)
+    long_arr = np.mod(storage[:, 5].astype(np.float64), 2 * np.pi)
+    alt_arr = storage[:, 6].astype(np.float64)
 
     plt.figure()
-    plt.plot(np.degrees(long_list), np.degrees(alt_list), 'b.')
+    plt.plot(np.degrees(long_arr), np.degrees(alt_arr), 'b.')
     plt.xlabel('Longitud [deg]')
     plt.ylabel('Lattitude [deg] ')
 
@@ -65,6 +65,19 @@ def vector_to_alpha_delta(vector):
     return alpha, delta
 
 
+def vectors_to_alpha_delta(vector_array):
+    """
+    Ref. Paper eq. [96]
+    Batched version of :func:`vector_to_alpha_delta` for one vector per row.
+    :param vector_array: (N, 3) array of X,Y,Z coordinates in CoMRS frame
+    :return: [rad][rad] (alpha, delta) as (N,) arrays, between 0 and 2*pi
+    """
+    alpha = np.arctan2(vector_array[:, 1], vector_array[:, 0]) % (2*np.pi)
+    dist_xy = np.sqrt(vector_array[:, 0]**2 + vector_array[:, 1]**2)
+    delta = np.arctan2(vector_array[:, 2], dist_xy) % (2*np.pi)
+    return alpha, delta
+
+
 def polar_to_direction(alpha, delta):
     """
     Convert polar angles to unit direction vector
@@ -199,13 +212,93 @@ def vector_to_quat(vector):
     return np.quaternion(0, vector[0], vector[1], vector[2])
 
 
+def rotate_vec_by_quat(attitude, vector):
+    """
+    Ref. Paper eq. [9]
+    Rotate vector by the quaternion attitude with the Rodrigues form
+    v' = v + (2w(u x v) + 2u x (u x v)) / |q|^2, u being the quaternion
+    vector part. The 1/|q|^2 scaling keeps this identical to the two
+    quaternion products of q v q^-1 also for non-unit attitudes (as fed
+    in by the attitude-update path), without allocating intermediate
+    quaternions.
+    """
+    u = np.array([attitude.x, attitude.y, attitude.z])
+    uxv = np.cross(u, vector)
+    norm2 = attitude.w**2 + attitude.x**2 + attitude.y**2 + attitude.z**2
+    return vector + (2*attitude.w*uxv + 2*np.cross(u, uxv)) / norm2
+
+
 def xyz_to_lmn(attitude, vector):
-    q_vector_xyz = vector_to_quat(vector)
-    q_vector_lmn = attitude * q_vector_xyz * attitude.inverse()
-    return quat_to_vector(q_vector_lmn)
+    return rotate_vec_by_quat(attitude, vector)
 
 
 def lmn_to_xyz(attitude, vector):
-    q_vector_lmn = vector_to_quat(vector)
-    q_vector_xyz = attitude.inverse() * q_vector_lmn * attitude
-    return quat_to_vector(q_vector_xyz)
+    # Rotation by the conjugate == rotation by the inverse, the norm being
+    # divided out inside rotate_vec_by_quat
+    return rotate_vec_by_quat(attitude.conjugate(), vector)
+
+
+# ### Batched versions (one quaternion per row, one vector per row)
+def unit_quaternion_array(attitude_array):
+    """
+    Normalize a batch of quaternions with one inverse square root per row
+    (branchless, SIMD-friendly).
+    :param attitude_array: (N, 4) array of quaternions (w, x, y, z)
+    :returns: (N, 4) array of the corresponding unit quaternions
+    """
+    inv_norms = 1.0 / np.sqrt(np.einsum('ij,ij->i', attitude_array, attitude_array))
+    return attitude_array * inv_norms[:, np.newaxis]
+
+
+def quat_to_matrix_array(attitude_array):
+    """
+    Rotation matrices of a batch of unit quaternions, such that
+    R @ v rotates v the same way as :func:`xyz_to_lmn` does.
+    :param attitude_array: (N, 4) array of unit quaternions (w, x, y, z)
+    :returns: (N, 3, 3) array of rotation matrices
+    """
+    w = attitude_array[:, 0]
+    x = attitude_array[:, 1]
+    y = attitude_array[:, 2]
+    z = attitude_array[:, 3]
+    rot = np.empty((attitude_array.shape[0], 3, 3))
+    rot[:, 0, 0] = 1 - 2*(y*y + z*z)
+    rot[:, 0, 1] = 2*(x*y - w*z)
+    rot[:, 0, 2] = 2*(x*z + w*y)
+    rot[:, 1, 0] = 2*(x*y + w*z)
+    rot[:, 1, 1] = 1 - 2*(x*x + z*z)
+    rot[:, 1, 2] = 2*(y*z - w*x)
+    rot[:, 2, 0] = 2*(x*z - w*y)
+    rot[:, 2, 1] = 2*(y*z + w*x)
+    rot[:, 2, 2] = 1 - 2*(x*x + y*y)
+    return rot
+
+
+
+def xyz_to_lmn_array(attitude_array, vector_array):
+    """
+    Ref. Paper eq. [9]
+    Batched version of :func:`xyz_to_lmn` for one attitude per vector.
+    :param attitude_array: (N, 4) array of unit quaternions (w, x, y, z)
+    :param vector_array: (N, 3) array of vectors in the SRS (xyz) frame
+    :returns: (N, 3) array of the vectors in the CoMRS (lmn) frame
+    """
+    w = attitude_array[:, 0:1]
+    u = attitude_array[:, 1:4]
+    uxv = np.cross(u, vector_array)
+    return vector_array + 2*w*uxv + 2*np.cross(u, uxv)
+
+
+def lmn_to_xyz_array(attitude_array, vector_array):
+    """
+    Ref. Paper eq. [9]
+    Batched version of :func:`lmn_to_xyz` for one attitude per vector.
+    :param attitude_array: (N, 4) array of unit quaternions (w, x, y, z)
+    :param vector_array: (N, 3) array of vectors in the CoMRS (lmn) frame
+    :returns: (N, 3) array of the vectors in the SRS (xyz) frame
+    """
+    # Rotation by the inverse quaternion, i.e. (w, -x, -y, -z)
+    w = attitude_array[:, 0:1]
+    u = attitude_array[:, 1:4]
+    uxv = np.cross(u, vector_array)
+    return vector_array - 2*w*uxv + 2*np.cross(u, uxv)
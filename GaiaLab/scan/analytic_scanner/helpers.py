@@ -113,6 +113,17 @@ def compute_angle(v1, v2):
     return np.arccos(np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2)))
 
 
+def compute_angles_array(v1, v2):
+    """
+    Batched version of :func:`compute_angle` for one vector per row.
+    :param vi: (N, 2) array of vectors for each i=1:2
+    :returns: (N,) array of angles between the paired vectors
+    """
+    cos_angles = (np.einsum('ij,ij->i', v1, v2)
+                  / (np.linalg.norm(v1, axis=1) * np.linalg.norm(v2, axis=1)))
+    return np.arccos(np.clip(cos_angles, -1, 1))
+
+
 def rescaled_direction(vector, length):
     unit_vector = vector/np.linalg.norm(vector)
     v = np.multiply(unit_vector, length)
@@ -180,6 +191,123 @@ def compute_intersection(x1, y1, x2, y2, x3, y3, x4, y4, segment=True):
     return (x_intersection, y_intersection), error_msg
 
 
+# Only need numpy as np
+def compute_intersections_array(segs1, segs2, eps=1e-15):
+    """
+    Batched version of :func:`compute_intersection` for pairs of segments.
+    Degenerate pairs (parallel segments, intersection out of the segment
+    bounds) are masked out instead of reported through an error message.
+    :param segs1: (N, 2, 2) array of segments [[x1, y1], [x2, y2]]
+    :param segs2: (N, 2, 2) array of segments [[x3, y3], [x4, y4]]
+    :param eps: threshold under which the determinant is considered null
+    :returns:
+        - (N, 2) array with the intersection points of the paired lines
+        - [array] (N,) boolean mask of the valid intersections
+
+    """
+    p1 = segs1[:, 0, :]
+    d1 = segs1[:, 1, :] - p1
+    p3 = segs2[:, 0, :]
+    d2 = segs2[:, 1, :] - p3
+
+    # Solve p1 + t*d1 = p3 + s*d2 for all pairs with the closed-form 2x2 rule
+    det = d1[:, 0] * d2[:, 1] - d1[:, 1] * d2[:, 0]
+    not_parallel = np.abs(det) > eps
+    safe_det = np.where(not_parallel, det, 1)
+    diff = p3 - p1
+    t = (diff[:, 0] * d2[:, 1] - diff[:, 1] * d2[:, 0]) / safe_det
+    points = p1 + t[:, np.newaxis] * d1
+
+    # Same bound conditions as in :func:`compute_intersection`
+    x, y = points[:, 0], points[:, 1]
+    x_low = np.maximum(np.minimum(segs1[:, 0, 0], segs1[:, 1, 0]),
+                       np.minimum(segs2[:, 0, 0], segs2[:, 1, 0]))
+    x_high = np.minimum(np.maximum(segs1[:, 0, 0], segs1[:, 1, 0]),
+                        np.maximum(segs2[:, 0, 0], segs2[:, 1, 0]))
+    y_low = np.maximum(np.minimum(segs1[:, 0, 1], segs1[:, 1, 1]),
+                       np.minimum(segs2[:, 0, 1], segs2[:, 1, 1]))
+    y_high = np.minimum(np.maximum(segs1[:, 0, 1], segs1[:, 1, 1]),
+                        np.maximum(segs2[:, 0, 1], segs2[:, 1, 1]))
+    in_bounds = (x > x_low) | (x < x_high) | (y > y_low) | (y < y_high)
+
+    return points, not_parallel & in_bounds
+
+
+# Only need numpy as np
+def chandrupatla_roots(f, a, b, args=(), xtol=2e-12, rtol=8.881784197001252e-16, maxiter=100):
+    """
+    Vectorized Chandrupatla root finder: solve f(x) = 0 simultaneously on
+    every bracket [a[i], b[i]], following T.R. Chandrupatla (1997).
+    Each iteration evaluates f once on the whole vector of current guesses,
+    so N roots cost one array evaluation per iteration instead of N scalar
+    solver calls.
+    :param f: vectorized residual, called as f(x_array, *args)
+    :param a: (N,) left ends of the brackets (f must change sign inside)
+    :param b: (N,) right ends of the brackets
+    :returns: (N,) array with one root per bracket
+    """
+    # Notation as in the paper: the current triplet is (x_a, x_b, x_c)
+    x_b = np.asarray(a, dtype='float64').copy()
+    x_a = np.asarray(b, dtype='float64').copy()
+    f_b = np.asarray(f(x_b, *args), dtype='float64')
+    f_a = np.asarray(f(x_a, *args), dtype='float64')
+    x_c, f_c = x_b.copy(), f_b.copy()
+
+    roots = np.full(x_a.shape, np.nan)
+    active = np.ones(x_a.shape, dtype=bool)
+
+    # Seed the first probe with the secant estimate instead of the
+    # midpoint: the residual is nearly linear over a scan bracket, so
+    # this usually lands within a tolerance of the root and saves a
+    # couple of iterations per lane
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = f_a / (f_a - f_b)
+    t = np.where(np.isfinite(t), np.clip(t, 0.05, 0.95), 0.5)
+
+    for _ in range(maxiter):
+        if not active.any():
+            break
+        xt = x_a + t * (x_b - x_a)
+        f_t = np.asarray(f(xt, *args), dtype='float64')
+
+        # Keep the sign change inside [x_a, x_b], third point becomes x_c
+        same = np.sign(f_t) == np.sign(f_a)
+        x_c = np.where(active, np.where(same, x_a, x_b), x_c)
+        f_c = np.where(active, np.where(same, f_a, f_b), f_c)
+        x_b = np.where(active & ~same, x_a, x_b)
+        f_b = np.where(active & ~same, f_a, f_b)
+        x_a = np.where(active, xt, x_a)
+        f_a = np.where(active, f_t, f_a)
+
+        closer = np.abs(f_a) < np.abs(f_b)
+        xm = np.where(closer, x_a, x_b)
+        fm = np.where(closer, f_a, f_b)
+        tol = 2 * rtol * np.abs(xm) + xtol
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tlim = tol / np.abs(x_b - x_c)
+        done = active & ((tlim > 0.5) | (fm == 0) | ~np.isfinite(tlim))
+        roots = np.where(done, xm, roots)
+        active &= ~done
+
+        # Inverse quadratic interpolation if the triplet allows it,
+        # bisection otherwise
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xi = (x_a - x_b) / (x_c - x_b)
+            phi = (f_a - f_b) / (f_c - f_b)
+            iqi = (phi**2 < xi) & ((1 - phi)**2 < 1 - xi)
+            t_iqi = (f_a / (f_b - f_a) * f_c / (f_b - f_c)
+                     + (x_c - x_a) / (x_b - x_a) * f_a / (f_c - f_a) * f_b / (f_c - f_b))
+        t = np.where(iqi & np.isfinite(t_iqi), t_iqi, 0.5)
+        t = np.minimum(1 - tlim, np.maximum(tlim, t))
+        t = np.where(active, t, 0.5)
+
+    # Lanes that hit maxiter: return the best point seen
+    leftover = np.isnan(roots)
+    if leftover.any():
+        roots = np.where(leftover, np.where(np.abs(f_a) < np.abs(f_b), x_a, x_b), roots)
+    return roots
+
+
 # import matplotlib.pylab as plt
 # import scipy.sparse as sps
 def plot_sparse():
@@ -17,6 +17,12 @@ import constants as const
 import frame_transformations as ft
 import quaternion
 
+# Unit axes of the SRS frame, hoisted so the axis accessors do not
+# reallocate them on every call
+_X_AXIS = np.array([1.0, 0.0, 0.0])
+_Y_AXIS = np.array([0.0, 1.0, 0.0])
+_Z_AXIS = np.array([0.0, 0.0, 1.0])
+
 
 class Satellite:
     """
@@ -111,11 +117,15 @@ class Satellite:
 
         self.s = self.l*np.cos(self._lambda) + self.j*np.sin(self._lambda)
 
+        # Longitude and latitude of the z axis at initialization
+        self.lamb_z = self._lambda + np.arctan2(np.tan(self.xi) * np.cos(self.nu), 1)
+        self.beta_z = np.arcsin(np.sin(self.xi) * np.sin(self.nu))
+
         self.attitude = self.__init_attitude()
 
-        self.z = ft.xyz_to_lmn(self.attitude, np.array([0, 0, 1]))
-        self.x = ft.xyz_to_lmn(self.attitude, np.array([1, 0, 0]))
-        self.w = np.cross(np.array([0, 0, 1]), self.z)
+        self.z = ft.xyz_to_lmn(self.attitude, _Z_AXIS)
+        self.x = ft.xyz_to_lmn(self.attitude, _X_AXIS)
+        self.w = np.cross(_Z_AXIS, self.z)
 
     def __init_attitude(self):
         """
@@ -183,12 +193,8 @@ class Satellite:
         """
         Creates spline for each component of the attitude quaternion:
             s_x, s_y, s_z, s_w
-
-        Attributes
-        -----------
-        :func_attitude: lambda func, returns: attitude quaternion at time t from spline.
-        :func_x_axis_lmn: lambda func, returns: position of x_axis of satellite at time t, in lmn frame.
-        :func_z_axis_lmn: lambda func, returns: position of z_axis of satellite at time t, in lmn frame.
+        The splines are then read by the func_attitude / func_*_axis_lmn
+        methods and their batched *_array versions.
         """
         w_list = []
         x_list = []
@@ -218,19 +224,100 @@ class Satellite:
         self.s_y = interpolate.InterpolatedUnivariateSpline(t_list, y_list, k=self.spline_order)
         self.s_z = interpolate.InterpolatedUnivariateSpline(t_list, z_list, k=self.spline_order)
 
-        # Alternativ efor the splines
-        # self.s_w_tck = splrep(t_list, w_list, s=0, k=self.spline_order)
-        # self.s_x_tck = splrep(t_list, x_list, s=0, k=self.spline_order)
-        # self.s_y_tck = splrep(t_list, y_list, s=0, k=self.spline_order)
-        # self.s_z_tck = splrep(t_list, z_list, s=0, k=self.spline_order)
+        # Same spline as a single vector-valued B-spline over the shared
+        # knots: one evaluation returns the four (w, x, y, z) components in
+        # an (N, 4) SoA layout instead of four separate spline calls
+        knots_w, coeffs_w, _ = splrep(t_list, w_list, s=0, k=self.spline_order)
+        coeffs = np.column_stack([coeffs_w,
+                                  splrep(t_list, x_list, s=0, k=self.spline_order)[1],
+                                  splrep(t_list, y_list, s=0, k=self.spline_order)[1],
+                                  splrep(t_list, z_list, s=0, k=self.spline_order)[1]])
+        self.att_bspline = interpolate.BSpline(knots_w, coeffs, self.spline_order)
+
+        # Cache for the batched evaluations, keyed by the raw bytes of the
+        # time array; cleared whenever the splines are rebuilt (init, reset)
+        self._batched_cache = {}
+
+    def func_attitude(self, t):
+        """
+        Attitude (one vector-valued spline evaluation per call)
+        :param t: [days]
+        :returns: attitude quaternion at time t from spline
+        """
+        return np.quaternion(*self.att_bspline(t)).normalized()
+
+    def func_x_axis_lmn(self, t):
+        """
+        :param t: [days]
+        :returns: position of the satellite x axis at time t, in lmn frame
+        """
+        return ft.xyz_to_lmn(self.func_attitude(t), _X_AXIS)  # wherewe want to be
+
+    def func_y_axis_lmn(self, t):
+        """
+        :param t: [days]
+        :returns: position of the satellite y axis at time t, in lmn frame
+        """
+        return ft.xyz_to_lmn(self.func_attitude(t), _Y_AXIS)
 
-        # Attitude
-        self.func_attitude = lambda t: np.quaternion(self.s_w(t), self.s_x(t), self.s_y(t),
-                                                     self.s_z(t)).normalized()
-        # Attitude in the lmn frame
-        self.func_x_axis_lmn = lambda t: ft.xyz_to_lmn(self.func_attitude(t), np.array([1, 0, 0]))  # wherewe want to be
-        self.func_y_axis_lmn = lambda t: ft.xyz_to_lmn(self.func_attitude(t), np.array([0, 1, 0]))
-        self.func_z_axis_lmn = lambda t: ft.xyz_to_lmn(self.func_attitude(t), np.array([0, 0, 1]))
+    def func_z_axis_lmn(self, t):
+        """
+        :param t: [days]
+        :returns: position of the satellite z axis at time t, in lmn frame
+        """
+        return ft.xyz_to_lmn(self.func_attitude(t), _Z_AXIS)
+
+    def func_attitude_array(self, t_array):
+        """
+        Batched version of func_attitude: evaluate the four attitude splines
+        on a whole array of times at once (the scipy splines are vectorized)
+        :param t_array: [1D array][days] times at which we desire the attitude
+        :returns: (N, 4) array with one (w, x, y, z) unit quaternion per row
+        """
+        t_array = np.asarray(t_array, dtype='float64')
+        key = ('attitude', t_array.tobytes())
+        if key not in self._batched_cache:
+            self._batched_cache[key] = ft.unit_quaternion_array(self.att_bspline(t_array))
+        return self._batched_cache[key]
+
+    def func_x_axis_lmn_array(self, t_array):
+        """
+        Batched version of func_x_axis_lmn.
+        :param t_array: [1D array][days]
+        :returns: (N, 3) positions of the satellite x axis in the lmn frame
+        """
+        t_array = np.asarray(t_array, dtype='float64')
+        key = ('x_axis', t_array.tobytes())
+        if key not in self._batched_cache:
+            self._batched_cache[key] = ft.xyz_to_lmn_array(self.func_attitude_array(t_array),
+                                                           _X_AXIS)
+        return self._batched_cache[key]
+
+    def func_y_axis_lmn_array(self, t_array):
+        """
+        Batched version of func_y_axis_lmn.
+        :param t_array: [1D array][days]
+        :returns: (N, 3) positions of the satellite y axis in the lmn frame
+        """
+        t_array = np.asarray(t_array, dtype='float64')
+        key = ('y_axis', t_array.tobytes())
+        if key not in self._batched_cache:
+            self._batched_cache[key] = ft.xyz_to_lmn_array(self.func_attitude_array(t_array),
+                                                           _Y_AXIS)
+        return self._batched_cache[key]
+
+    def func_z_axis_lmn_array(self, t_array):
+        """
+        Batched version of func_z_axis_lmn.
+        :param t_array: [1D array][days]
+        :returns: (N, 3) positions of the satellite z axis in the lmn frame
+        """
+        t_array = np.asarray(t_array, dtype='float64')
+        key = ('z_axis', t_array.tobytes())
+        if key not in self._batched_cache:
+            self._batched_cache[key] = ft.xyz_to_lmn_array(self.func_attitude_array(t_array),
+                                                           _Z_AXIS)
+        return self._batched_cache[key]
 
     def __reset_to_time(self, t, dt):
         '''
@@ -258,12 +345,12 @@ class Satellite:
             self.__reset_to_time(ti, dt)
 
         n_steps = (tf - ti) / dt
-        self.storage.append([self.t, self.w, self.z,
-                             self.x, self.attitude, self.s])
+        self.storage.append([self.t, self.w, self.z, self.x, self.attitude,
+                             self.lamb_z, self.beta_z, self.s])
         for i in np.arange(n_steps):
             self.__update(dt)
-            self.storage.append([self.t, self.w, self.z,
-                                 self.x, self.attitude, self.s])
+            self.storage.append([self.t, self.w, self.z, self.x, self.attitude,
+                                 self.lamb_z, self.beta_z, self.s])
 
         self.storage.sort(key=lambda x: x[0])
 
@@ -11,6 +11,7 @@ Scanner class implementation in Python
 import numpy as np
 import time
 from scipy import optimize
+from numba import njit
 import quaternion
 # Local imports
 import constants as const
@@ -22,19 +23,59 @@ from agis_functions import *
 
 
 # fonctions used in the loop
+@njit(cache=True)
+def eta_angle_core(qw, qx, qy, qz, cu_x, cu_y, cu_z, eta_shift):
+    """
+    Scalar kernel of the scanner residual: rotate the CoMRS direction into
+    the SRS frame with the conjugate of the (unit) attitude quaternion and
+    shift the along-scan angle by the field-of-view offset, without building
+    a rotation matrix or numpy temporaries.
+    """
+    ux, uy, uz = -qx, -qy, -qz
+    cx = uy * cu_z - uz * cu_y
+    cy = uz * cu_x - ux * cu_z
+    cz = ux * cu_y - uy * cu_x
+    Su_x = cu_x + 2 * qw * cx + 2 * (uy * cz - uz * cy)
+    Su_y = cu_y + 2 * qw * cy + 2 * (uz * cx - ux * cz)
+
+    return np.arctan2(Su_y, Su_x) + eta_shift
+
+
+def get_eta_shift(FoV):
+    """:returns: [rad] along-scan offset of the given field of view"""
+    if FoV == 'centered':
+        return 0
+    elif FoV == 'preceding':
+        return const.Gamma_c / 2
+    elif FoV == 'following':
+        return - const.Gamma_c / 2
+    raise ValueError('incorrect FoV argument.')
+
+
 def eta_angle(t, sat, source, FoV='centered'):
     """
     Function to minimize in the scanner.
     See `observed_field_angles()`
     """
+    Cu_unit = source.unit_topocentric_function(sat, t)
+    q = quaternion.as_float_array(sat.func_attitude(t))
+    return eta_angle_core(q[0], q[1], q[2], q[3],
+                          Cu_unit[0], Cu_unit[1], Cu_unit[2], get_eta_shift(FoV))
+
+
+def eta_angle_array(t_array, sat, source, FoV='centered'):
+    """
+    Batched version of :func:`eta_angle` for an array of times, used by the
+    vectorized root finder (bypasses the satellite memo cache since every
+    iteration evaluates a different time vector).
+    """
     Gamma_c = const.Gamma_c
 
-    Cu_unit = source.unit_topocentric_function(sat, t)
-    Su = ft.lmn_to_xyz(sat.func_attitude(t), Cu_unit)
+    attitude_array = ft.unit_quaternion_array(sat.att_bspline(t_array))
+    Cu = source.unit_topocentric_function_array(sat, t_array)
+    Su = ft.lmn_to_xyz_array(attitude_array, Cu)
 
-    Su_x, Su_y, Su_z = Su[:]
-    phi = np.arctan2(Su_y, Su_x)
-    field_index = np.sign(phi)
+    phi = np.arctan2(Su[:, 1], Su[:, 0])
     if FoV == 'centered':
         eta = phi
     elif FoV == 'preceding':
@@ -69,6 +110,18 @@ def violated_contraints(eta_a, zeta_a, eta_b, zeta_b, zeta_limit):
     return False
 
 
+def violated_contraints_array(eta_a, zeta_a, eta_b, zeta_b, zeta_limit):
+    """
+    Batch version of :func:`violated_contraints`: the three predicates are
+    evaluated as boolean arrays over all brackets at once and OR-ed.
+    :returns: (N,) boolean array, True where the bracket is to be discarded
+    """
+    no_sign_change = eta_a * eta_b >= 0
+    too_high = np.abs(zeta_a + zeta_b)/2 > zeta_limit   # ~ |zeta|<= 0.5°
+    outside_fov = (np.abs(eta_a) > np.pi/2) & (np.abs(eta_b) > np.pi/2)
+    return no_sign_change | too_high | outside_fov
+
+
 # Scanner class
 class Scanner:
 
@@ -131,44 +184,53 @@ class Scanner:
             t_list = generate_scanned_times_intervals(day_list, time_step)
         else:
             t_list = np.arange(ti, tf, time_step)
-        t_old = 0
-        # Looping
-        for t in t_list:
-            # Check constraints
-            if (t == t_old) & (t_old > 0):
-                # print(t)
-                phi_a, zeta_a = (phi_b, zeta_b)
-            else:
-                phi_a, zeta_a = observed_field_angles(source, sat.func_attitude(t), sat, t, double_telescope=False)
-            phi_b, zeta_b = observed_field_angles(source, sat.func_attitude(t+time_step), sat, t+time_step,
-                                                  double_telescope=False)
-
-            for FoV in self.FoVs:
-                eta_a, eta_b = get_etas_from_phis(phi_a, phi_b, FoV)
-                if violated_contraints(eta_a, zeta_a, eta_b, zeta_b, self.zeta_limit):
-                    continue
-                x0, r = optimize.brentq(f=eta_angle, a=t, b=t+time_step, args=(sat, source, FoV),
-                                        xtol=2e-20, rtol=8.881784197001252e-16,
-                                        maxiter=100, full_output=True, disp=False)
-                self.obs_times.append(x0)
-                """if FoV == 'preceding':
-                    self.obs_times_PFoV.append(x0)
-                elif FoV == 'following':
-                    self.obs_times_FFoV.append(x0)
-                else:
-                    pass"""
-            t_old = t+time_step
+        t_list = np.asarray(t_list, dtype='float64')
+
+        # Field angles at both ends of every bracket, for the whole grid at
+        # once. Consecutive brackets share an endpoint, so deduplicate the
+        # times first and evaluate each grid point exactly once
+        t_all = np.concatenate([t_list, t_list + time_step])
+        t_unique, inverse = np.unique(t_all, return_inverse=True)
+        phi_all, _, zeta_all = field_angles_and_phi_array(source, sat, t_unique)
+        n_brackets = len(t_list)
+        phi_a_all, zeta_a_all = phi_all[inverse[:n_brackets]], zeta_all[inverse[:n_brackets]]
+        phi_b_all, zeta_b_all = phi_all[inverse[n_brackets:]], zeta_all[inverse[n_brackets:]]
+
+        # Keep the surviving brackets of each field of view (one fused
+        # boolean mask per FoV) and solve them all at once, then emit the
+        # roots back in scan order (ascending t, FoVs in order)
+        all_roots = []
+        all_keys = []
+        for k, FoV in enumerate(self.FoVs):
+            eta_a_all, eta_b_all = get_etas_from_phis(phi_a_all, phi_b_all, FoV)
+            index = np.flatnonzero(~violated_contraints_array(eta_a_all, zeta_a_all,
+                                                              eta_b_all, zeta_b_all,
+                                                              self.zeta_limit))
+            if len(index) == 0:
+                continue
+            starts = t_list[index]
+            all_roots.append(helpers.chandrupatla_roots(eta_angle_array, starts, starts + time_step,
+                                                        args=(sat, source, FoV),
+                                                        xtol=2e-20, rtol=8.881784197001252e-16,
+                                                        maxiter=100))
+            all_keys.append(index * len(self.FoVs) + k)
+        if all_roots:
+            all_roots = np.concatenate(all_roots)
+            order = np.argsort(np.concatenate(all_keys))
+            self.obs_times.extend(all_roots[order].tolist())
         return time.time()-t0  # Total measured time
         # End of function
 
     def compute_angles_eta_zeta(self, sat, source):
         """ Compute angles and remove 'illegal' observations (|zeta| > zeta_lim)"""
-        for t in self.obs_times:
-            eta, zeta = observed_field_angles(source, sat.func_attitude(t), sat, t, self.double_telescope)
-            if np.abs(zeta) >= self.zeta_limit:
-                continue
-            self.eta_scanned.append(eta)
-            self.zeta_scanned.append(zeta)
+        if not self.obs_times:
+            return
+        obs_times = np.asarray(self.obs_times, dtype='float64')
+        _, eta, zeta = field_angles_and_phi_array(source, sat, obs_times,
+                                                  self.double_telescope)
+        legal = np.abs(zeta) < self.zeta_limit
+        self.eta_scanned.extend(eta[legal])
+        self.zeta_scanned.extend(zeta[legal])
 
     def scanner_error(self):
         if not self.eta_scanned:
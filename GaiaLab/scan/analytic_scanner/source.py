@@ -36,6 +36,27 @@ def compute_topocentric_direction(astro_parameters, sat, t):
     return topocentric / norm_topocentric
 
 
+def compute_topocentric_direction_array(astro_parameters, sat, t_array):
+    """
+    Batched version of :func:`compute_topocentric_direction` for an array of
+    observation times.
+    :param astro_parameters: [array] alpha, delta, parallax, mu_alpha_dx, mu_delta, mu_radial
+    :param sat: [Satellite object]
+    :param t_array: [1D array][days] observation times
+    :return: [array] (N, 3) direction-vectors of the star from the satellite's lmn frame.
+    """
+    alpha, delta, parallax, mu_alpha_dx, mu_delta, mu_radial = astro_parameters[:]
+    p, q, r = ft.compute_pqr(alpha, delta)
+    t_array = np.asarray(t_array, dtype='float64')
+    b_G = sat.ephemeris_bcrs(t_array)  # (3, N) [Au]
+    mu = p * mu_alpha_dx + q * mu_delta + r * mu_radial
+    topocentric = (r[np.newaxis, :] + t_array[:, np.newaxis] * mu[np.newaxis, :]
+                   - b_G.T * const.Au_per_Au * parallax)
+    norms = np.linalg.norm(topocentric, axis=1)
+
+    return topocentric / norms[:, np.newaxis]
+
+
 class Source:
     """
     Source class implemented to represent a source object in the sky
@@ -107,6 +128,17 @@ class Source:
         self.alpha = self.__alpha0 + mu_alpha_dx*t
         self.delta = self.__delta0 + mu_delta*t
 
+    def alpha_delta_arrays(self, t_array):
+        """
+        Positions (alpha, delta) of the star at each of the given times,
+        without mutating the source state (pure version of :meth:`set_time`).
+        :param t_array: [1D array][days]
+        :returns: (alpha, delta) as (N,) arrays [rad]
+        """
+        t_array = np.asarray(t_array)
+        return (self.__alpha0 + self.mu_alpha_dx * t_array,
+                self.__delta0 + self.mu_delta * t_array)
+
     def barycentric_direction(self, t):
         """
         Direction unit vector to star from bcrs.
@@ -144,6 +176,16 @@ class Source:
         param = np.array([self.__alpha0, self.__delta0, self.parallax, self.mu_alpha_dx, self.mu_delta, self.mu_radial])
         return compute_topocentric_direction(param, satellite, t)
 
+    def unit_topocentric_function_array(self, satellite, t_array):
+        """
+        Batched version of :meth:`unit_topocentric_function` for an array of times.
+        :param satellite: satellite [class object]
+        :param t_array: [1D array][days]
+        :return: [array] (N, 3) direction-vectors of the star from the satellite's lmn frame.
+        """
+        param = np.array([self.__alpha0, self.__delta0, self.parallax, self.mu_alpha_dx, self.mu_delta, self.mu_radial])
+        return compute_topocentric_direction_array(param, satellite, t_array)
+
     def topocentric_angles(self, satellite, t):
         """
         Calculates the angles of movement of the star from bcrs.
@@ -162,3 +204,18 @@ class Source:
         delta_delta_mas = (delta_obs - self.__delta0) / const.rad_per_mas
 
         return alpha_obs, delta_obs, delta_alpha_dx_mas, delta_delta_mas  # mas
+
+    def topocentric_angles_array(self, satellite, t_array):
+        """
+        Batched version of :meth:`topocentric_angles` for an array of times.
+        :param satellite: satellite object
+        :param t_array: [1D array][days]
+        :return: alpha, delta, delta alpha, delta delta as (N,) arrays [mas]
+        """
+        u_lmn_units = self.unit_topocentric_function_array(satellite, t_array)
+        alpha_obs, delta_obs = ft.vectors_to_alpha_delta(u_lmn_units)
+
+        delta_alpha_dx_mas = (alpha_obs - self.__alpha0) * np.cos(self.__delta0) / const.rad_per_mas
+        delta_delta_mas = (delta_obs - self.__delta0) / const.rad_per_mas
+
+        return alpha_obs, delta_obs, delta_alpha_dx_mas, delta_delta_mas  # mas
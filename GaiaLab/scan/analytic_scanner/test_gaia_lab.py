@@ -13,6 +13,7 @@ import quaternion
 
 import numpy as np
 from scipy import interpolate
+from scipy import optimize
 from scipy.interpolate import BSpline
 from scipy.interpolate import splev
 import unittest
@@ -332,6 +333,31 @@ class test_helpers(unittest.TestCase):
             self.assertAlmostEqual(v3[i], vector[i])
         self.assertAlmostEqual(np.pi / 2, angle)
 
+    def test_chandrupatla_roots_against_brentq(self):
+        """ the vectorized solver must reproduce brentq on every bracket"""
+        def f(x):
+            return np.cos(3 * x) - 0.2
+
+        a = np.linspace(0.1, 2.5, 50)
+        b = a + 0.3
+        sign_change = np.sign(f(a)) != np.sign(f(b))
+        a, b = a[sign_change], b[sign_change]
+        roots = helpers.chandrupatla_roots(f, a, b)
+        self.assertEqual(len(a), len(roots))
+        for i in range(len(a)):
+            root_brentq = optimize.brentq(f, a[i], b[i])
+            self.assertAlmostEqual(root_brentq, roots[i], places=10)
+
+    def test_chandrupatla_roots_converged_endpoints(self):
+        """ brackets whose ends already are the root must be returned as is"""
+        def f(x):
+            return x - 1.0
+
+        roots = helpers.chandrupatla_roots(f, np.array([1.0, 0.0, 0.5]),
+                                           np.array([2.0, 1.0, 1.5]))
+        for root in roots:
+            self.assertAlmostEqual(1.0, root, places=12)
+
     def test_get_lists_intersection(self):
         """ test if it returns indeed the intersection of the lists"""
         list1 = [0, 1, 2, 3, 4, 5]